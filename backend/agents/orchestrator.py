@@ -12,11 +12,11 @@ from langgraph.graph import StateGraph, END
 from langchain_anthropic import ChatAnthropic
 from langchain_core.messages import HumanMessage, SystemMessage
 
-from models.db import get_sync_db_context
+from models.db import configure_vector_session, get_db_context, get_sync_db_context
 from models.database import BOM, BOMItem, AgentTask, ApprovalRequest, Supplier, Part, SupplierPart
 from tools.parsing_tools import parse_excel_bom, parse_csv_bom, validate_bom_structure
 from tools.search_tools import search_supplier_catalog_impl, semantic_part_search_impl
-from tools.po_tools import create_po_draft_impl, group_items_by_supplier_impl
+from tools.po_tools import create_po_drafts_bulk, group_items_by_supplier_impl
 from prompts.agent_prompts import (
     BOM_PARSER_PROMPT,
     SUPPLIER_MATCHER_PROMPT,
@@ -162,6 +162,31 @@ async def parser_node(state: WorkflowState) -> WorkflowState:
     }
 
 
+async def _find_match(bom_item: BOMItem, organization_id: int) -> tuple[Optional[dict], list[dict]]:
+    """Best supplier match and up to four alternatives for one BOM item."""
+    async with get_db_context() as db:
+        # Try exact match first
+        if bom_item.part_number_raw:
+            result = await search_supplier_catalog_impl(db, bom_item.part_number_raw, organization_id)
+            if result.get("matches"):
+                return result["matches"][0], result["matches"][1:5]
+
+        # Try semantic match if no exact match
+        if bom_item.description_raw and settings.openai_api_key:
+            try:
+                await configure_vector_session(db)
+                result = await semantic_part_search_impl(
+                    db, bom_item.description_raw, organization_id
+                )
+                if result.get("matches"):
+                    return result["matches"][0], result["matches"][1:5]
+            except Exception as e:
+                logger.warning(f"Semantic search failed: {e}")
+                await db.rollback()
+
+    return None, []
+
+
 async def matcher_node(state: WorkflowState) -> WorkflowState:
     """Supplier Matcher Agent - matches items to suppliers."""
     logger.info(f"Matcher agent processing {len(state['parsed_items'])} items")
@@ -182,32 +207,24 @@ async def matcher_node(state: WorkflowState) -> WorkflowState:
         bom_items = db.query(BOMItem).filter(BOMItem.bom_id == bom.id).all()
 
         total_items = len(bom_items)
-        for idx, bom_item in enumerate(bom_items):
-            progress = 30 + (idx / total_items * 30)  # 30-60%
-            update_bom_progress(state["bom_id"], "matching", progress, f"Matching item {idx + 1}/{total_items}")
 
-            best_match = None
-            alternatives = []
+        # Search for every item concurrently, each on its own async session,
+        # so embedding and database waits overlap across items
+        search_slots = asyncio.Semaphore(settings.match_concurrency)
+        searched = 0
 
-            # Try exact match first
-            if bom_item.part_number_raw:
-                result = search_supplier_catalog_impl(db, bom_item.part_number_raw, organization_id)
-                if result.get("matches"):
-                    best_match = result["matches"][0]
-                    alternatives = result["matches"][1:5]
-
-            # Try semantic match if no exact match
-            if not best_match and bom_item.description_raw and settings.openai_api_key:
-                try:
-                    result = semantic_part_search_impl(
-                        db, bom_item.description_raw, organization_id
-                    )
-                    if result.get("matches"):
-                        best_match = result["matches"][0]
-                        alternatives = result["matches"][1:5]
-                except Exception as e:
-                    logger.warning(f"Semantic search failed: {e}")
+        async def find_match(bom_item: BOMItem) -> tuple[Optional[dict], list[dict]]:
+            nonlocal searched
+            async with search_slots:
+                found = await _find_match(bom_item, organization_id)
+            searched += 1
+            progress = 30 + (searched / total_items * 30)  # 30-60%
+            update_bom_progress(state["bom_id"], "matching", progress, f"Matched item {searched}/{total_items}")
+            return found
 
+        found_matches = await asyncio.gather(*(find_match(bom_item) for bom_item in bom_items))
+
+        for bom_item, (best_match, alternatives) in zip(bom_items, found_matches):
             # Update BOM item with match
             if best_match:
                 bom_item.matched_supplier_id = best_match["supplier_id"]
@@ -383,23 +400,25 @@ async def po_generator_node(state: WorkflowState) -> WorkflowState:
         # Group by supplier
         grouped = group_items_by_supplier_impl(items_dict)
 
-        # Create PO for each supplier
-        for supplier_id, supplier_items in grouped.items():
-            result = create_po_draft_impl(
-                db=db,
-                organization_id=bom.organization_id,
-                supplier_id=supplier_id,
-                items=supplier_items,
-                bom_id=bom.id,
-                bom_name=bom.name,  # Track source BOM for demo visibility
-            )
+        # Keyed before the commit below expires the loaded items
+        bom_items_by_id = {item.id: item for item in bom_items}
+
+        # Create a PO for each supplier
+        results = create_po_drafts_bulk(
+            db=db,
+            organization_id=bom.organization_id,
+            items_by_supplier=grouped,
+            bom_id=bom.id,
+            bom_name=bom.name,  # Track source BOM for demo visibility
+        )
 
+        for supplier_items, result in zip(grouped.values(), results):
             if result.get("success"):
                 draft_pos.append(result)
 
                 # Update BOM items with PO reference (confirmed = PO created but not yet sent)
                 for item in supplier_items:
-                    bom_item = db.query(BOMItem).filter(BOMItem.id == item["bom_item_id"]).first()
+                    bom_item = bom_items_by_id.get(item["bom_item_id"])
                     if bom_item:
                         bom_item.status = "confirmed"
 
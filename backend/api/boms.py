@@ -7,7 +7,6 @@ import os
 import uuid
 import logging
 from typing import Optional
-from datetime import datetime
 
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -15,7 +14,7 @@ from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 
 from models.db import get_db
-from models.database import BOM, BOMItem, AgentTask, Organization, SupplierPart
+from models.database import BOM, BOMItem, AgentTask, Organization, SupplierPart, normalize_part_number
 from models.schemas import (
     BOMResponse,
     BOMDetailResponse,
@@ -245,14 +244,20 @@ async def update_bom_item(
         item.match_confidence = 1.0
 
         # Try to find a SupplierPart with pricing for this part/supplier combination
-        # Match by part number if available
+        # Match by normalized part number if available, preferring an exact match
         if item.part_number_raw:
-            supplier_part_query = select(SupplierPart).where(
-                SupplierPart.supplier_id == supplier_id,
-                SupplierPart.supplier_part_number.ilike(f"%{item.part_number_raw}%")
+            pn_normalized = normalize_part_number(item.part_number_raw)
+            supplier_part_query = (
+                select(SupplierPart)
+                .where(
+                    SupplierPart.supplier_id == supplier_id,
+                    SupplierPart.supplier_part_number_norm.contains(pn_normalized, autoescape=True),
+                )
+                .order_by((SupplierPart.supplier_part_number_norm == pn_normalized).desc())
+                .limit(1)
             )
             result = await db.execute(supplier_part_query)
-            supplier_part = result.scalar_one_or_none()
+            supplier_part = result.scalars().first()
 
             if supplier_part and supplier_part.unit_price:
                 # Auto-populate price from SupplierPart if no manual price provided
@@ -269,16 +274,17 @@ async def update_bom_item(
         from decimal import Decimal
         item.extended_cost = Decimal(str(item.unit_cost)) * Decimal(str(item.quantity))
 
-    item.updated_at = datetime.utcnow()
-
-    # Flush changes and refresh with relationships loaded
+    # Flush changes and refresh with relationships loaded; updated_at is
+    # set by the database trigger
     await db.flush()
 
-    # Re-fetch with eager loading to avoid async relationship issues
+    # Re-fetch with eager loading to avoid async relationship issues;
+    # populate_existing reloads server-generated columns such as updated_at
     query = (
         select(BOMItem)
         .where(BOMItem.id == item_id)
         .options(selectinload(BOMItem.matched_supplier))
+        .execution_options(populate_existing=True)
     )
     result = await db.execute(query)
     item = result.scalar_one()
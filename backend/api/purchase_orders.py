@@ -12,7 +12,16 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from models.db import get_db
-from models.database import PurchaseOrder, POItem, Supplier, ApprovalRequest, Organization, BOMItem
+from models.database import (
+    PurchaseOrder,
+    POItem,
+    Supplier,
+    ApprovalRequest,
+    Organization,
+    BOMItem,
+    PO_NUMBER_SEQ,
+    format_po_number,
+)
 from models.schemas import (
     POResponse,
     PODetailResponse,
@@ -30,9 +39,7 @@ settings = get_settings()
 
 async def generate_po_number(db: AsyncSession) -> str:
     """Generate a unique PO number."""
-    result = await db.execute(select(func.count()).select_from(PurchaseOrder))
-    count = result.scalar()
-    return f"PO-{datetime.now().strftime('%Y%m')}-{count + 1:04d}"
+    return format_po_number(await db.scalar(select(PO_NUMBER_SEQ.next_value())))
 
 
 async def get_default_org(db: AsyncSession) -> Organization:
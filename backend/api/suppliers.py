@@ -5,11 +5,11 @@ import logging
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select, func, or_
+from sqlalchemy import literal_column, select, func, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from models.db import get_db
+from models.db import get_db, configure_vector_session
 from models.database import Supplier, Part, SupplierPart, Organization
 from models.schemas import (
     SupplierResponse,
@@ -244,11 +244,14 @@ async def semantic_supplier_search(
     query_embedding = embedding_service.create_embedding(request.query)
 
     # Vector similarity search
+    await configure_vector_session(db)
     distance_expr = Supplier.description_embedding.cosine_distance(query_embedding)
     result = await db.execute(
         select(Supplier, distance_expr.label("distance"))
         .where(Supplier.description_embedding.isnot(None))
-        .where(Supplier.status == "active")
+        # Literal, not a bind parameter, so the planner can always match
+        # the status = 'active' partial HNSW indexes
+        .where(Supplier.status == literal_column("'active'"))
         .order_by(distance_expr)
         .limit(request.top_k)
     )
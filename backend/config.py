@@ -36,10 +36,18 @@ class Settings(BaseSettings):
     db_max_overflow: int = 20
     db_pool_pre_ping: bool = True
     db_pool_recycle: int = 3600  # Recycle connections after 1 hour
+    db_pool_timeout: float = 5.0  # Fail fast when the pool is exhausted
+    db_server_max_connections: int = 100  # PostgreSQL max_connections, shared by all workers
+    db_statement_cache_size: int = 2048  # asyncpg server-side prepared statement LRU
+    db_query_cache_size: int = 1200  # SQLAlchemy compiled SQL cache entries
 
     # Redis
     redis_url: str = "redis://localhost:6379"
     redis_cache_ttl: int = 3600  # 1 hour default cache TTL
+    redis_socket_connect_timeout: float = 1.0  # seconds; sync catalog cache client
+    redis_socket_timeout: float = 1.0  # seconds per sync catalog cache command
+    cache_schema_version: int = 1  # Bump to invalidate all cached LLM responses on deploy
+    catalog_cache_ttl: int = 600  # Cached catalog lookups (invalidated on catalog writes)
 
     # Rate Limiting
     rate_limit_enabled: bool = True
@@ -56,17 +64,38 @@ class Settings(BaseSettings):
     llm_temperature: float = 0.0
     llm_timeout: int = 120  # seconds
 
+    # Provider HTTP connection pool (shared settings for OpenAI / Anthropic clients)
+    http_max_connections: int = 64
+    http_max_keepalive_connections: int = 32
+    http_keepalive_expiry: float = 30.0  # seconds an idle connection is kept
+    http_connect_timeout: float = 5.0  # seconds
+    embedding_timeout: float = 30.0  # seconds per embeddings request
+
     embedding_model: str = "text-embedding-3-small"
     embedding_dimensions: int = 1536
+    embedding_cache_size: int = 10_000  # In-process LRU entries; Redis backs it across workers
+    embed_batch_window_ms: int = 10  # Coalesce single embedding requests arriving within this window
+    embed_batch_size: int = 128  # Dispatch a coalesced batch early once it reaches this size
+    embed_chunk_size: int = 1000  # Inputs per embeddings API request (provider max 2048)
+    embed_max_concurrent_batches: int = 4  # Embedding API requests in flight per batch call
+    semantic_search_cache_size: int = 1024  # Cached semantic part searches per process
+    semantic_search_cache_threshold: float = 0.97  # Cosine similarity at which a cached query is reused
+    semantic_search_cache_ttl: int = 300  # seconds a cached semantic search result is served
 
     # Agent settings
     max_agent_iterations: int = 10
     agent_timeout_seconds: int = 120
+    match_concurrency: int = 8  # BOM items searched at once, each holding a DB connection
 
     # RAG settings
     rag_enabled: bool = True
     rag_similarity_threshold: float = 0.7
     rag_top_k: int = 5
+    hnsw_ef_search: int = 100  # HNSW candidate list size per vector query
+    hnsw_iterative_scan: str = "strict_order"  # Keep scanning when filters drop candidates ("off" to disable; skipped on pgvector < 0.8)
+    hnsw_max_scan_tuples: int = 20_000  # Upper bound on tuples an iterative scan visits
+    vector_work_mem: str = "64MB"  # work_mem for vector search transactions
+    memory_rerank_factor: int = 0  # >0: fetch top_k * factor HNSW candidates and rerank exactly in-process
 
     # Approval thresholds
     po_approval_threshold: float = 10000.0
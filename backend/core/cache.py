@@ -3,10 +3,13 @@ Redis caching service for LLM responses and rate limiting.
 """
 import hashlib
 import json
+import threading
+import time
 from typing import Any, Optional
 import logging
 
 import redis.asyncio as redis
+from redis import Redis as SyncRedis
 
 from config import get_settings
 
@@ -16,6 +19,10 @@ logger = logging.getLogger(__name__)
 # Global cache instance
 _cache: Optional["RedisCache"] = None
 
+# Catalog generation counter and the channel its bumps are announced on
+CATALOG_VERSION_KEY = "catalog:version"
+CATALOG_INVALIDATION_CHANNEL = "catalog:invalidate"
+
 
 class RedisCache:
     """
@@ -186,3 +193,136 @@ async def close_cache() -> None:
 def get_cache() -> Optional[RedisCache]:
     """Get the cache instance."""
     return _cache
+
+
+class CatalogCache:
+    """
+    Sync Redis cache for catalog lookups made by the agent tools.
+
+    Keys are prefixed with the catalog generation, so bumping it on any
+    catalog write retires every cached entry at once. Each process learns
+    the new generation over pubsub, keeping a hit to a single GET.
+
+    Every call blocks on Redis, so async callers run them in a worker
+    thread (see the catalog_cache_* helpers below).
+    """
+
+    def __init__(self, url: str):
+        self._client = SyncRedis.from_url(
+            url,
+            encoding="utf-8",
+            decode_responses=True,
+            socket_connect_timeout=settings.redis_socket_connect_timeout,
+            socket_timeout=settings.redis_socket_timeout,
+        )
+        self.version = self._client.get(CATALOG_VERSION_KEY) or "0"
+        self.healthy = True
+        pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{CATALOG_INVALIDATION_CHANNEL: self._on_invalidate})
+        self._listener = pubsub.run_in_thread(
+            sleep_time=1.0,
+            daemon=True,
+            exception_handler=self._on_listener_error,
+        )
+
+    def _on_invalidate(self, message: dict) -> None:
+        self.version = message["data"]
+
+    def _on_listener_error(self, error: Exception, pubsub, thread) -> None:
+        # Without the subscription this process could miss a generation
+        # bump, so stop serving from this instance and let it reconnect
+        logger.warning(f"Redis catalog invalidation listener failed: {error}")
+        self.healthy = False
+        thread.stop()
+        pubsub.close()
+
+    def close(self) -> None:
+        """Stop the invalidation listener and close the client."""
+        self._listener.stop()
+        self._client.close()
+
+    def get(self, key: str) -> Optional[str]:
+        """Get a value cached for the current catalog generation."""
+        try:
+            return self._client.get(f"catalog:{self.version}:{key}")
+        except Exception as e:
+            logger.warning(f"Redis catalog get error: {e}")
+            return None
+
+    def set(self, key: str, value: str, ttl: Optional[int] = None) -> bool:
+        """Cache a value for the current catalog generation."""
+        try:
+            self._client.set(
+                f"catalog:{self.version}:{key}", value,
+                ex=ttl or settings.catalog_cache_ttl,
+            )
+            return True
+        except Exception as e:
+            logger.warning(f"Redis catalog set error: {e}")
+            return False
+
+    def invalidate(self) -> None:
+        """Start a new catalog generation and announce it to every process."""
+        try:
+            version = str(self._client.incr(CATALOG_VERSION_KEY))
+            self._client.publish(CATALOG_INVALIDATION_CHANNEL, version)
+            self.version = version
+        except Exception as e:
+            logger.warning(f"Redis catalog invalidation error: {e}")
+
+
+_catalog_cache: Optional[CatalogCache] = None
+_catalog_cache_lock = threading.Lock()
+# Reconnect backoff after a failed connection attempt
+_catalog_cache_failures = 0
+_catalog_cache_retry_at = 0.0
+_CATALOG_CACHE_MAX_BACKOFF = 60.0
+
+
+def get_catalog_cache() -> Optional[CatalogCache]:
+    """
+    Get the catalog cache, connecting on first use.
+
+    Blocks on Redis; call from a worker thread in async code. After a
+    failed connection, attempts back off exponentially (up to a minute)
+    instead of disabling catalog caching for the life of the process.
+    """
+    global _catalog_cache, _catalog_cache_failures, _catalog_cache_retry_at
+    cache = _catalog_cache
+    if cache is not None and cache.healthy:
+        return cache
+
+    with _catalog_cache_lock:
+        if _catalog_cache is not None and not _catalog_cache.healthy:
+            _catalog_cache.close()
+            _catalog_cache = None
+        if _catalog_cache is None and time.monotonic() >= _catalog_cache_retry_at:
+            try:
+                _catalog_cache = CatalogCache(settings.redis_url)
+                _catalog_cache_failures = 0
+            except Exception as e:
+                _catalog_cache_failures += 1
+                backoff = min(2.0 ** _catalog_cache_failures, _CATALOG_CACHE_MAX_BACKOFF)
+                _catalog_cache_retry_at = time.monotonic() + backoff
+                logger.warning(f"Redis catalog cache unavailable: {e}. Retrying in {backoff:.0f}s.")
+        return _catalog_cache
+
+
+def catalog_cache_get(key: str) -> Optional[str]:
+    """Get a cached catalog lookup, or None if missing or Redis is down."""
+    cache = get_catalog_cache()
+    return cache.get(key) if cache else None
+
+
+def catalog_cache_set(key: str, value: str) -> None:
+    """Cache a catalog lookup if Redis is available."""
+    cache = get_catalog_cache()
+    if cache:
+        cache.set(key, value)
+
+
+def invalidate_catalog_cache() -> None:
+    """Retire every cached catalog lookup across processes."""
+    cache = get_catalog_cache()
+    if cache:
+        cache.invalidate()
@@ -0,0 +1,42 @@
+"""
+Pooled HTTP/2 clients for the LLM and embedding provider SDKs.
+
+The OpenAI and Anthropic SDKs accept an ``http_client``; passing one with
+HTTP/2 and a keep-alive pool lets bursts of requests reuse (and multiplex
+over) warm connections instead of paying a TLS handshake each time.
+"""
+import httpx
+
+from config import get_settings
+
+settings = get_settings()
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive_connections,
+        keepalive_expiry=settings.http_keepalive_expiry,
+    )
+
+
+def create_http_client(timeout: float) -> httpx.Client:
+    """Create a pooled HTTP/2 client for a synchronous SDK client."""
+    return httpx.Client(
+        http2=True,
+        timeout=httpx.Timeout(timeout, connect=settings.http_connect_timeout),
+        limits=_limits(),
+    )
+
+
+def create_async_http_client(timeout: float) -> httpx.AsyncClient:
+    """
+    Create a pooled HTTP/2 client for an async SDK client.
+
+    The pool is bound to the event loop it is first used on.
+    """
+    return httpx.AsyncClient(
+        http2=True,
+        timeout=httpx.Timeout(timeout, connect=settings.http_connect_timeout),
+        limits=_limits(),
+    )
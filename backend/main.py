@@ -8,7 +8,7 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 
 from config import get_settings
 from core.logging import setup_logging, get_logger
@@ -91,6 +91,7 @@ app = FastAPI(
     description="BOM/PO Multi-Agent System for manufacturing procurement automation",
     version=settings.app_version,
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     docs_url="/docs" if not settings.is_production else None,  # Disable in production
     redoc_url="/redoc" if not settings.is_production else None,
     openapi_url="/openapi.json" if not settings.is_production else None,
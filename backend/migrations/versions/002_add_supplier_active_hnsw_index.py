@@ -0,0 +1,32 @@
+"""Add partial HNSW index on active supplier embeddings
+
+Revision ID: 002_supplier_active_hnsw
+Revises: 001_add_po_auto_gen
+Create Date: 2026-10-15
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '002_supplier_active_hnsw'
+down_revision: Union[str, None] = '001_add_po_auto_gen'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_suppliers_active_hnsw
+            ON suppliers USING hnsw (description_embedding vector_cosine_ops)
+            WHERE status = 'active'
+        """)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_suppliers_active_hnsw")
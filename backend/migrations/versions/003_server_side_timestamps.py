@@ -0,0 +1,79 @@
+"""Move created_at/updated_at defaults to the server and use timestamptz
+
+Revision ID: 003_server_timestamps
+Revises: 002_supplier_active_hnsw
+Create Date: 2026-10-15
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '003_server_timestamps'
+down_revision: Union[str, None] = '002_supplier_active_hnsw'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TIMESTAMP_COLUMNS = {
+    'organizations': ['created_at', 'updated_at'],
+    'users': ['created_at'],
+    'suppliers': ['created_at', 'updated_at'],
+    'parts': ['created_at', 'updated_at'],
+    'supplier_parts': ['created_at', 'updated_at'],
+    'boms': ['created_at', 'updated_at'],
+    'bom_items': ['created_at', 'updated_at'],
+    'purchase_orders': ['created_at', 'updated_at'],
+    'po_items': ['created_at'],
+    'agent_tasks': ['created_at'],
+    'approval_requests': ['created_at'],
+    'agent_memories': ['created_at', 'accessed_at'],
+}
+
+
+def upgrade() -> None:
+    # Existing values were written with datetime.utcnow(), so treat them as UTC
+    for table, columns in TIMESTAMP_COLUMNS.items():
+        for column in columns:
+            op.execute(f"UPDATE {table} SET {column} = now() AT TIME ZONE 'UTC' WHERE {column} IS NULL")
+            op.alter_column(
+                table,
+                column,
+                type_=sa.DateTime(timezone=True),
+                postgresql_using=f"{column} AT TIME ZONE 'UTC'",
+                server_default=sa.func.now(),
+                nullable=False,
+            )
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION set_updated_at() RETURNS trigger AS $$
+        BEGIN NEW.updated_at = now(); RETURN NEW; END $$ LANGUAGE plpgsql
+    """)
+    for table, columns in TIMESTAMP_COLUMNS.items():
+        if 'updated_at' in columns:
+            op.execute(f"""
+                CREATE OR REPLACE TRIGGER trg_{table}_updated_at
+                BEFORE UPDATE ON {table}
+                FOR EACH ROW EXECUTE FUNCTION set_updated_at()
+            """)
+
+
+def downgrade() -> None:
+    for table, columns in TIMESTAMP_COLUMNS.items():
+        if 'updated_at' in columns:
+            op.execute(f"DROP TRIGGER IF EXISTS trg_{table}_updated_at ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS set_updated_at()")
+
+    for table, columns in TIMESTAMP_COLUMNS.items():
+        for column in columns:
+            op.alter_column(
+                table,
+                column,
+                type_=sa.DateTime(),
+                postgresql_using=f"{column} AT TIME ZONE 'UTC'",
+                server_default=None,
+                nullable=True,
+            )
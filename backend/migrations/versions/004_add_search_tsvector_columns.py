@@ -0,0 +1,41 @@
+"""Add generated tsvector search columns with GIN indexes to suppliers and parts
+
+Revision ID: 004_search_tsvector
+Revises: 003_server_timestamps
+Create Date: 2026-10-15
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '004_search_tsvector'
+down_revision: Union[str, None] = '003_server_timestamps'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        ALTER TABLE suppliers ADD COLUMN IF NOT EXISTS search_tsv tsvector
+        GENERATED ALWAYS AS (
+            to_tsvector('english', coalesce(name, '') || ' ' || coalesce(description, '') || ' ' || coalesce(code, ''))
+        ) STORED
+    """)
+    op.execute("""
+        ALTER TABLE parts ADD COLUMN IF NOT EXISTS search_tsv tsvector
+        GENERATED ALWAYS AS (
+            to_tsvector('english', coalesce(name, '') || ' ' || coalesce(description, '') || ' ' || coalesce(part_number, ''))
+        ) STORED
+    """)
+    op.execute("CREATE INDEX IF NOT EXISTS idx_suppliers_search_gin ON suppliers USING gin (search_tsv)")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_parts_search_gin ON parts USING gin (search_tsv)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_parts_search_gin")
+    op.execute("DROP INDEX IF EXISTS idx_suppliers_search_gin")
+    op.drop_column('parts', 'search_tsv')
+    op.drop_column('suppliers', 'search_tsv')
@@ -0,0 +1,49 @@
+"""Move JSONB column defaults to the server and make them NOT NULL
+
+Revision ID: 005_jsonb_server_defaults
+Revises: 004_search_tsvector
+Create Date: 2026-10-15
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '005_jsonb_server_defaults'
+down_revision: Union[str, None] = '004_search_tsvector'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (table, column, empty value)
+JSONB_COLUMNS = [
+    ('organizations', 'settings', '{}'),
+    ('suppliers', 'capabilities', '[]'),
+    ('suppliers', 'certifications', '[]'),
+    ('suppliers', 'extra_data', '{}'),
+    ('parts', 'specifications', '{}'),
+    ('supplier_parts', 'price_breaks', '[]'),
+    ('boms', 'extra_data', '{}'),
+    ('bom_items', 'alternative_matches', '[]'),
+    ('purchase_orders', 'tracking_numbers', '[]'),
+    ('purchase_orders', 'extra_data', '{}'),
+    ('agent_tasks', 'input_data', '{}'),
+    ('agent_tasks', 'output_data', '{}'),
+    ('approval_requests', 'details', '{}'),
+    ('agent_memories', 'extra_data', '{}'),
+]
+
+
+def upgrade() -> None:
+    for table, column, empty in JSONB_COLUMNS:
+        default = sa.text(f"'{empty}'::jsonb")
+        op.execute(f"UPDATE {table} SET {column} = '{empty}'::jsonb WHERE {column} IS NULL")
+        op.alter_column(table, column, server_default=default, nullable=False)
+
+
+def downgrade() -> None:
+    for table, column, _ in JSONB_COLUMNS:
+        op.alter_column(table, column, server_default=None, nullable=True)
@@ -0,0 +1,33 @@
+"""Add HNSW cosine index on agent memory embeddings
+
+Revision ID: 006_agent_memory_hnsw
+Revises: 005_jsonb_server_defaults
+Create Date: 2026-10-15
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '006_agent_memory_hnsw'
+down_revision: Union[str, None] = '005_jsonb_server_defaults'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_agent_memories_embedding_hnsw
+            ON agent_memories USING hnsw (embedding vector_cosine_ops)
+            WITH (m = 16, ef_construction = 64)
+            WHERE embedding IS NOT NULL
+        """)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_agent_memories_embedding_hnsw")
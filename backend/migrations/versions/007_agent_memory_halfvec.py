@@ -0,0 +1,46 @@
+"""Store agent memory embeddings as halfvec
+
+Revision ID: 007_agent_memory_halfvec
+Revises: 006_agent_memory_hnsw
+Create Date: 2026-10-15
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '007_agent_memory_halfvec'
+down_revision: Union[str, None] = '006_agent_memory_hnsw'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The HNSW opclass is type-specific, so rebuild the index around the cast
+    op.execute("DROP INDEX IF EXISTS idx_agent_memories_embedding_hnsw")
+    op.execute("""
+        ALTER TABLE agent_memories
+        ALTER COLUMN embedding TYPE halfvec(1536) USING embedding::halfvec(1536)
+    """)
+    op.execute("""
+        CREATE INDEX idx_agent_memories_embedding_hnsw
+        ON agent_memories USING hnsw (embedding halfvec_cosine_ops)
+        WITH (m = 16, ef_construction = 64)
+        WHERE embedding IS NOT NULL
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_agent_memories_embedding_hnsw")
+    op.execute("""
+        ALTER TABLE agent_memories
+        ALTER COLUMN embedding TYPE vector(1536) USING embedding::vector(1536)
+    """)
+    op.execute("""
+        CREATE INDEX idx_agent_memories_embedding_hnsw
+        ON agent_memories USING hnsw (embedding vector_cosine_ops)
+        WITH (m = 16, ef_construction = 64)
+        WHERE embedding IS NOT NULL
+    """)
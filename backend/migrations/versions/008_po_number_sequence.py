@@ -0,0 +1,29 @@
+"""Allocate PO numbers from a sequence
+
+Revision ID: 008_po_number_seq
+Revises: 007_agent_memory_halfvec
+Create Date: 2026-10-15
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '008_po_number_seq'
+down_revision: Union[str, None] = '007_agent_memory_halfvec'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE SEQUENCE IF NOT EXISTS po_number_seq")
+    # Continue numbering where the old count(*) + 1 scheme left off
+    op.execute("""
+        SELECT setval('po_number_seq', (SELECT count(*) FROM purchase_orders) + 1, false)
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP SEQUENCE IF EXISTS po_number_seq")
@@ -0,0 +1,39 @@
+"""Add generated normalized part number columns for catalog matching
+
+Revision ID: 009_part_number_norm
+Revises: 008_po_number_seq
+Create Date: 2026-10-15
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '009_part_number_norm'
+down_revision: Union[str, None] = '008_po_number_seq'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        ALTER TABLE parts ADD COLUMN IF NOT EXISTS part_number_norm varchar(100)
+        GENERATED ALWAYS AS (upper(replace(replace(btrim(part_number), '-', ''), ' ', ''))) STORED
+    """)
+    op.execute("""
+        ALTER TABLE supplier_parts ADD COLUMN IF NOT EXISTS supplier_part_number_norm varchar(100)
+        GENERATED ALWAYS AS (upper(replace(replace(btrim(supplier_part_number), '-', ''), ' ', ''))) STORED
+    """)
+    op.execute("CREATE INDEX IF NOT EXISTS idx_parts_org_pn_norm ON parts (organization_id, part_number_norm)")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_supplier_parts_pn_norm ON supplier_parts (supplier_part_number_norm)")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_supplier_parts_part_id ON supplier_parts (part_id)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_supplier_parts_part_id")
+    op.execute("DROP INDEX IF EXISTS idx_supplier_parts_pn_norm")
+    op.execute("DROP INDEX IF EXISTS idx_parts_org_pn_norm")
+    op.drop_column('supplier_parts', 'supplier_part_number_norm')
+    op.drop_column('parts', 'part_number_norm')
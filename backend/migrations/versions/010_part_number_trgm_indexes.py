@@ -0,0 +1,34 @@
+"""Add pg_trgm indexes on normalized part numbers
+
+Revision ID: 010_part_number_trgm
+Revises: 009_part_number_norm
+Create Date: 2026-10-15
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '010_part_number_trgm'
+down_revision: Union[str, None] = '009_part_number_norm'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_parts_pn_norm_trgm
+        ON parts USING gin (part_number_norm gin_trgm_ops)
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_supplier_parts_pn_norm_trgm
+        ON supplier_parts USING gin (supplier_part_number_norm gin_trgm_ops)
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_supplier_parts_pn_norm_trgm")
+    op.execute("DROP INDEX IF EXISTS idx_parts_pn_norm_trgm")
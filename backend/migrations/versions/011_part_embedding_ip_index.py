@@ -0,0 +1,41 @@
+"""Normalize part embeddings and index them for inner-product search
+
+Revision ID: 011_part_embedding_ip
+Revises: 010_part_number_trgm
+Create Date: 2026-10-15
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '011_part_embedding_ip'
+down_revision: Union[str, None] = '010_part_number_trgm'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Unit-length vectors make the inner product equal to cosine similarity
+    op.execute("""
+        UPDATE parts
+        SET description_embedding = l2_normalize(description_embedding)
+        WHERE description_embedding IS NOT NULL
+    """)
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_parts_embedding_hnsw
+            ON parts USING hnsw (description_embedding vector_ip_ops)
+            WITH (m = 16, ef_construction = 64)
+            WHERE description_embedding IS NOT NULL
+        """)
+
+
+def downgrade() -> None:
+    # Normalized embeddings stay valid for cosine search, so only the index goes
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_parts_embedding_hnsw")
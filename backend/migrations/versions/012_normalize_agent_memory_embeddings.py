@@ -0,0 +1,32 @@
+"""Normalize stored agent memory embeddings to unit length
+
+Revision ID: 012_agent_memory_unit_vectors
+Revises: 011_part_embedding_ip
+Create Date: 2026-10-15
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '012_agent_memory_unit_vectors'
+down_revision: Union[str, None] = '011_part_embedding_ip'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # New memories are written unit-normalized and the in-process rerank
+    # scores with a plain dot product; bring older rows in line
+    op.execute("""
+        UPDATE agent_memories
+        SET embedding = l2_normalize(embedding)
+        WHERE embedding IS NOT NULL
+    """)
+
+
+def downgrade() -> None:
+    # Normalized embeddings stay valid for cosine search; nothing to undo
+    pass
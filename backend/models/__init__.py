@@ -15,9 +15,69 @@ from models.database import (
     AgentTask,
     ApprovalRequest,
     AgentMemory,
+    PO_NUMBER_SEQ,
+    format_po_number,
 )
 from models.db import get_db, get_db_context, init_db, async_engine as engine, AsyncSessionLocal as SessionLocal
-from models.schemas import *
+from models.bulk import (
+    bulk_upsert_parts,
+    bulk_upsert_parts_sync,
+    bulk_upsert_supplier_parts,
+    bulk_upsert_supplier_parts_sync,
+)
+from models import catalog_events  # noqa: F401  (registers catalog cache invalidation)
+from models.pricing import PRICE_BREAK_QUANTITIES, expand_price_breaks
+
+# Pydantic schemas are loaded on first access (PEP 562) so ORM-only
+# processes (migrations, seeding, agent workers) skip building them.
+_SCHEMA_NAMES = frozenset({
+    "BaseSchema",
+    "SupplierBase",
+    "SupplierCreate",
+    "SupplierUpdate",
+    "SupplierResponse",
+    "SupplierListResponse",
+    "SupplierMatchResponse",
+    "PartBase",
+    "PartCreate",
+    "PartResponse",
+    "SupplierPartBase",
+    "SupplierPartCreate",
+    "SupplierPartResponse",
+    "BOMItemBase",
+    "BOMItemUpdate",
+    "BOMItemResponse",
+    "BOMBase",
+    "BOMCreate",
+    "BOMResponse",
+    "BOMDetailResponse",
+    "BOMUploadResponse",
+    "BOMStatusResponse",
+    "POItemBase",
+    "POItemResponse",
+    "POBase",
+    "POCreate",
+    "POResponse",
+    "PODetailResponse",
+    "POListResponse",
+    "POApprovalRequest",
+    "POReceiptRequest",
+    "TaskResponse",
+    "TaskDetailResponse",
+    "TaskListResponse",
+    "ApprovalResponse",
+    "ApprovalListResponse",
+    "ApprovalDecision",
+    "SemanticSearchRequest",
+})
+
+
+def __getattr__(name: str):
+    if name in _SCHEMA_NAMES:
+        from models import schemas
+        return getattr(schemas, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "Base",
@@ -33,9 +93,17 @@ __all__ = [
     "AgentTask",
     "ApprovalRequest",
     "AgentMemory",
+    "PO_NUMBER_SEQ",
+    "format_po_number",
     "get_db",
     "get_db_context",
     "init_db",
     "engine",
     "SessionLocal",
+    "bulk_upsert_parts",
+    "bulk_upsert_parts_sync",
+    "bulk_upsert_supplier_parts",
+    "bulk_upsert_supplier_parts_sync",
+    "PRICE_BREAK_QUANTITIES",
+    "expand_price_breaks",
 ]
@@ -0,0 +1,109 @@
+"""
+Bulk upsert helpers for catalog ingestion.
+
+Uses PostgreSQL multi-row INSERT ... ON CONFLICT ... RETURNING so a whole
+batch of parts / supplier parts is written in one round-trip.
+"""
+from typing import Iterator
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from models.catalog_events import CATALOG_CHANGED
+from models.database import Part, SupplierPart
+
+# PostgreSQL caps a statement at 65535 bind parameters; 5000 rows keeps
+# us well under that for every table we upsert.
+BULK_CHUNK_SIZE = 5000
+
+
+def _chunks(rows: list[dict], size: int = BULK_CHUNK_SIZE) -> Iterator[list[dict]]:
+    """Yield successive slices of rows."""
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+_PART_CONFLICT_KEYS = ("organization_id", "part_number")
+_SUPPLIER_PART_CONFLICT_KEYS = ("supplier_id", "part_id")
+
+
+def _upsert_statements(model, rows: list[dict], conflict_keys: tuple[str, ...]) -> Iterator:
+    """
+    Yield one INSERT ... ON CONFLICT DO UPDATE ... RETURNING id per chunk.
+
+    Only the columns present in the rows are updated on conflict, so a
+    caller that omits a column leaves the stored value alone instead of
+    overwriting it with NULL or the column default.
+    """
+    for chunk in _chunks(rows):
+        stmt = pg_insert(model).values(chunk)
+        set_ = {key: stmt.excluded[key] for key in chunk[0] if key not in conflict_keys}
+        set_["updated_at"] = func.now()
+        yield stmt.on_conflict_do_update(
+            index_elements=list(conflict_keys),
+            set_=set_,
+        ).returning(model.id)
+
+
+async def bulk_upsert_parts(session: AsyncSession, rows: list[dict]) -> list[int]:
+    """
+    Insert or update parts keyed on (organization_id, part_number).
+
+    Args:
+        session: Async database session
+        rows: Part column dicts with identical keys; each must include
+            organization_id and part_number, and (organization_id, part_number)
+            must be unique within the batch. Existing parts only have the
+            given columns updated.
+
+    Returns:
+        IDs of the inserted or updated parts
+    """
+    ids: list[int] = []
+    for stmt in _upsert_statements(Part, rows, _PART_CONFLICT_KEYS):
+        result = await session.execute(stmt)
+        ids.extend(result.scalars().all())
+    # Core upserts bypass ORM events, so flag the catalog change directly
+    session.info[CATALOG_CHANGED] = True
+    return ids
+
+
+async def bulk_upsert_supplier_parts(session: AsyncSession, rows: list[dict]) -> list[int]:
+    """
+    Insert or update supplier parts keyed on (supplier_id, part_id).
+
+    Args:
+        session: Async database session
+        rows: SupplierPart column dicts with identical keys; each must include
+            supplier_id and part_id, unique within the batch. Existing
+            supplier parts only have the given columns updated.
+
+    Returns:
+        IDs of the inserted or updated supplier parts
+    """
+    ids: list[int] = []
+    for stmt in _upsert_statements(SupplierPart, rows, _SUPPLIER_PART_CONFLICT_KEYS):
+        result = await session.execute(stmt)
+        ids.extend(result.scalars().all())
+    session.info[CATALOG_CHANGED] = True
+    return ids
+
+
+def bulk_upsert_parts_sync(session: Session, rows: list[dict]) -> list[int]:
+    """Sync version of bulk_upsert_parts, for seeding scripts."""
+    ids: list[int] = []
+    for stmt in _upsert_statements(Part, rows, _PART_CONFLICT_KEYS):
+        ids.extend(session.scalars(stmt).all())
+    session.info[CATALOG_CHANGED] = True
+    return ids
+
+
+def bulk_upsert_supplier_parts_sync(session: Session, rows: list[dict]) -> list[int]:
+    """Sync version of bulk_upsert_supplier_parts, for seeding scripts."""
+    ids: list[int] = []
+    for stmt in _upsert_statements(SupplierPart, rows, _SUPPLIER_PART_CONFLICT_KEYS):
+        ids.extend(session.scalars(stmt).all())
+    session.info[CATALOG_CHANGED] = True
+    return ids
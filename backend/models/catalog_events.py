@@ -0,0 +1,48 @@
+"""
+Catalog change tracking for cache invalidation.
+
+Writes to parts, supplier parts or suppliers mark the session; once that
+session commits, the catalog cache generation is bumped so every process
+drops its cached catalog lookups.
+"""
+import asyncio
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from core.cache import invalidate_catalog_cache
+from models.database import Part, Supplier, SupplierPart
+
+# Session.info flag set when a flush touched catalog rows
+CATALOG_CHANGED = "catalog_changed"
+
+
+def _mark_catalog_changed(mapper, connection, target) -> None:
+    session = object_session(target)
+    if session is not None:
+        session.info[CATALOG_CHANGED] = True
+
+
+for _model in (Part, SupplierPart, Supplier):
+    for _event in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event, _mark_catalog_changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_catalog_cache(session: Session) -> None:
+    if not session.info.pop(CATALOG_CHANGED, False):
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # Scripts and other sync callers can wait on Redis
+        invalidate_catalog_cache()
+        return
+    # Async sessions (and sync sessions opened inside coroutines) commit on
+    # the event loop; keep the blocking Redis calls off it
+    loop.run_in_executor(None, invalidate_catalog_cache)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_catalog_change(session: Session) -> None:
+    session.info.pop(CATALOG_CHANGED, None)
@@ -5,6 +5,7 @@ from datetime import datetime
 from typing import Optional
 from sqlalchemy import (
     Column,
+    Computed,
     Integer,
     String,
     Text,
@@ -15,12 +16,36 @@ from sqlalchemy import (
     Index,
     DECIMAL,
     Date,
+    FetchedValue,
+    Sequence,
+    func,
+    text,
 )
-from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy.orm import relationship, declarative_base
-from pgvector.sqlalchemy import Vector
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.orm import DeclarativeBase, relationship, deferred
+from pgvector.sqlalchemy import HALFVEC, Vector
 
-Base = declarative_base()
+
+class Base(DeclarativeBase):
+    """Declarative base for all Procura models."""
+
+
+# Timestamps are filled in by PostgreSQL (now() on insert, set_updated_at()
+# trigger on update) so INSERT/UPDATE statements carry no client clock values.
+TS = DateTime(timezone=True)
+
+# Server-side JSONB defaults: no per-row JSON encoding or shared mutable default
+EMPTY_JSONB_OBJECT = text("'{}'::jsonb")
+EMPTY_JSONB_ARRAY = text("'[]'::jsonb")
+
+# Part number normalization for catalog matching (trim, drop '-' and ' ',
+# upper-case), kept in the database as stored generated columns
+PART_NUMBER_NORM_SQL = "upper(replace(replace(btrim({column}), '-', ''), ' ', ''))"
+
+
+def normalize_part_number(part_number: str) -> str:
+    """Python equivalent of PART_NUMBER_NORM_SQL, for query parameters."""
+    return part_number.strip().upper().replace("-", "").replace(" ", "")
 
 
 class Organization(Base):
@@ -30,9 +55,9 @@ class Organization(Base):
 
     id = Column(Integer, primary_key=True)
     name = Column(String(255), nullable=False)
-    settings = Column(JSONB, default={})
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    settings = Column(JSONB, nullable=False, server_default=EMPTY_JSONB_OBJECT)
+    created_at = Column(TS, server_default=func.now(), nullable=False)
+    updated_at = Column(TS, server_default=func.now(), server_onupdate=FetchedValue(), nullable=False)
 
     # Relationships
     users = relationship("User", back_populates="organization")
@@ -52,7 +77,7 @@ class User(Base):
     email = Column(String(255), unique=True, nullable=False)
     name = Column(String(255), nullable=False)
     role = Column(String(50), default="user")  # admin, approver, user
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(TS, server_default=func.now(), nullable=False)
 
     # Relationships
     organization = relationship("Organization", back_populates="users")
@@ -75,13 +100,21 @@ class Supplier(Base):
     lead_time_days = Column(Integer)
     rating = Column(DECIMAL(3, 2))
     status = Column(String(50), default="active")  # active, inactive, pending
-    capabilities = Column(JSONB, default=[])  # List of capability strings
-    certifications = Column(JSONB, default=[])  # List of certification strings
+    capabilities = Column(JSONB, nullable=False, server_default=EMPTY_JSONB_ARRAY)  # List of capability strings
+    certifications = Column(JSONB, nullable=False, server_default=EMPTY_JSONB_ARRAY)  # List of certification strings
     # Vector embedding for semantic matching
     description_embedding = Column(Vector(1536))
-    extra_data = Column(JSONB, default={})
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Full-text search vector, maintained by PostgreSQL (deferred: only used in WHERE clauses)
+    search_tsv = deferred(Column(
+        TSVECTOR,
+        Computed(
+            "to_tsvector('english', coalesce(name, '') || ' ' || coalesce(description, '') || ' ' || coalesce(code, ''))",
+            persisted=True,
+        ),
+    ))
+    extra_data = Column(JSONB, nullable=False, server_default=EMPTY_JSONB_OBJECT)
+    created_at = Column(TS, server_default=func.now(), nullable=False)
+    updated_at = Column(TS, server_default=func.now(), server_onupdate=FetchedValue(), nullable=False)
 
     # Relationships
     organization = relationship("Organization", back_populates="suppliers")
@@ -89,6 +122,15 @@ class Supplier(Base):
 
     __table_args__ = (
         Index("idx_suppliers_org_status", "organization_id", "status"),
+        # Partial HNSW index: semantic supplier search only ever targets active suppliers
+        Index(
+            "idx_suppliers_active_hnsw",
+            "description_embedding",
+            postgresql_using="hnsw",
+            postgresql_ops={"description_embedding": "vector_cosine_ops"},
+            postgresql_where=text("status = 'active'"),
+        ),
+        Index("idx_suppliers_search_gin", "search_tsv", postgresql_using="gin"),
     )
 
 
@@ -100,15 +142,28 @@ class Part(Base):
     id = Column(Integer, primary_key=True)
     organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
     part_number = Column(String(100), nullable=False)
+    # Normalized part number, maintained by PostgreSQL (deferred: only used in WHERE clauses)
+    part_number_norm = deferred(Column(
+        String(100),
+        Computed(PART_NUMBER_NORM_SQL.format(column="part_number"), persisted=True),
+    ))
     name = Column(String(255), nullable=False)
     description = Column(Text)
     category = Column(String(100))
     unit_of_measure = Column(String(50), default="EA")
-    specifications = Column(JSONB, default={})
-    # Vector embedding for semantic search
+    specifications = Column(JSONB, nullable=False, server_default=EMPTY_JSONB_OBJECT)
+    # Unit-length vector embedding for semantic search (inner product = cosine)
     description_embedding = Column(Vector(1536))
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Full-text search vector, maintained by PostgreSQL (deferred: only used in WHERE clauses)
+    search_tsv = deferred(Column(
+        TSVECTOR,
+        Computed(
+            "to_tsvector('english', coalesce(name, '') || ' ' || coalesce(description, '') || ' ' || coalesce(part_number, ''))",
+            persisted=True,
+        ),
+    ))
+    created_at = Column(TS, server_default=func.now(), nullable=False)
+    updated_at = Column(TS, server_default=func.now(), server_onupdate=FetchedValue(), nullable=False)
 
     # Relationships
     organization = relationship("Organization", back_populates="parts")
@@ -116,6 +171,24 @@ class Part(Base):
 
     __table_args__ = (
         Index("idx_parts_org_pn", "organization_id", "part_number", unique=True),
+        Index("idx_parts_org_pn_norm", "organization_id", "part_number_norm"),
+        # Trigram index for substring / similarity matching on part numbers
+        Index(
+            "idx_parts_pn_norm_trgm",
+            "part_number_norm",
+            postgresql_using="gin",
+            postgresql_ops={"part_number_norm": "gin_trgm_ops"},
+        ),
+        Index("idx_parts_search_gin", "search_tsv", postgresql_using="gin"),
+        # Inner-product HNSW index backing semantic part search (<#> operator)
+        Index(
+            "idx_parts_embedding_hnsw",
+            "description_embedding",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"description_embedding": "vector_ip_ops"},
+            postgresql_where=text("description_embedding IS NOT NULL"),
+        ),
     )
 
 
@@ -128,15 +201,20 @@ class SupplierPart(Base):
     supplier_id = Column(Integer, ForeignKey("suppliers.id"), nullable=False)
     part_id = Column(Integer, ForeignKey("parts.id"), nullable=False)
     supplier_part_number = Column(String(100))
+    # Normalized supplier part number, maintained by PostgreSQL (deferred: only used in WHERE clauses)
+    supplier_part_number_norm = deferred(Column(
+        String(100),
+        Computed(PART_NUMBER_NORM_SQL.format(column="supplier_part_number"), persisted=True),
+    ))
     unit_price = Column(DECIMAL(15, 4))
     currency = Column(String(3), default="USD")
     min_order_qty = Column(Integer, default=1)
     lead_time_days = Column(Integer)
     is_preferred = Column(Boolean, default=False)
-    price_breaks = Column(JSONB, default=[])  # [{qty: 100, price: 5.50}, ...]
+    price_breaks = Column(JSONB, nullable=False, server_default=EMPTY_JSONB_ARRAY)  # prices per PRICE_BREAK_QUANTITIES tier
     last_quote_date = Column(Date)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(TS, server_default=func.now(), nullable=False)
+    updated_at = Column(TS, server_default=func.now(), server_onupdate=FetchedValue(), nullable=False)
 
     # Relationships
     supplier = relationship("Supplier", back_populates="supplier_parts")
@@ -144,6 +222,14 @@ class SupplierPart(Base):
 
     __table_args__ = (
         Index("idx_supplier_parts_unique", "supplier_id", "part_id", unique=True),
+        Index("idx_supplier_parts_part_id", "part_id"),
+        Index("idx_supplier_parts_pn_norm", "supplier_part_number_norm"),
+        Index(
+            "idx_supplier_parts_pn_norm_trgm",
+            "supplier_part_number_norm",
+            postgresql_using="gin",
+            postgresql_ops={"supplier_part_number_norm": "gin_trgm_ops"},
+        ),
     )
 
 
@@ -170,10 +256,10 @@ class BOM(Base):
     processing_step = Column(String(255))  # Current step description
     processing_error = Column(Text)
     agent_run_id = Column(String(255))  # LangSmith trace ID
-    extra_data = Column(JSONB, default={})
+    extra_data = Column(JSONB, nullable=False, server_default=EMPTY_JSONB_OBJECT)
     created_by = Column(Integer, ForeignKey("users.id"))
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(TS, server_default=func.now(), nullable=False)
+    updated_at = Column(TS, server_default=func.now(), server_onupdate=FetchedValue(), nullable=False)
 
     # Relationships
     organization = relationship("Organization", back_populates="boms")
@@ -204,13 +290,13 @@ class BOMItem(Base):
     # Matching metadata
     match_confidence = Column(DECIMAL(3, 2))  # 0.00-1.00
     match_method = Column(String(50))  # exact, semantic, manual
-    alternative_matches = Column(JSONB, default=[])  # [{supplier_id, confidence, price}, ...]
+    alternative_matches = Column(JSONB, nullable=False, server_default=EMPTY_JSONB_ARRAY)  # [{supplier_id, confidence, price}, ...]
     # Status
     status = Column(String(50), default="pending")  # pending, matched, confirmed, ordered, needs_review
     review_reason = Column(String(255))  # Why it needs review
     notes = Column(Text)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(TS, server_default=func.now(), nullable=False)
+    updated_at = Column(TS, server_default=func.now(), server_onupdate=FetchedValue(), nullable=False)
 
     # Relationships
     bom = relationship("BOM", back_populates="items")
@@ -223,6 +309,15 @@ class BOMItem(Base):
     )
 
 
+# Allocates the numeric suffix of PO numbers (see format_po_number)
+PO_NUMBER_SEQ = Sequence("po_number_seq", metadata=Base.metadata)
+
+
+def format_po_number(seq_value: int) -> str:
+    """Format a PO number from a po_number_seq value."""
+    return f"PO-{datetime.now().strftime('%Y%m')}-{seq_value:04d}"
+
+
 class PurchaseOrder(Base):
     """Purchase Order."""
 
@@ -259,13 +354,13 @@ class PurchaseOrder(Base):
     acknowledged_at = Column(DateTime)
     expected_ship_date = Column(Date)
     actual_ship_date = Column(Date)
-    tracking_numbers = Column(JSONB, default=[])
+    tracking_numbers = Column(JSONB, nullable=False, server_default=EMPTY_JSONB_ARRAY)
     received_at = Column(DateTime)
     # Metadata
-    extra_data = Column(JSONB, default={})
+    extra_data = Column(JSONB, nullable=False, server_default=EMPTY_JSONB_OBJECT)
     created_by = Column(Integer, ForeignKey("users.id"))
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(TS, server_default=func.now(), nullable=False)
+    updated_at = Column(TS, server_default=func.now(), server_onupdate=FetchedValue(), nullable=False)
 
     # Relationships
     organization = relationship("Organization", back_populates="purchase_orders")
@@ -297,7 +392,7 @@ class POItem(Base):
     extended_price = Column(DECIMAL(15, 4))
     received_quantity = Column(DECIMAL(15, 4), default=0)
     notes = Column(Text)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(TS, server_default=func.now(), nullable=False)
 
     # Relationships
     purchase_order = relationship("PurchaseOrder", back_populates="items")
@@ -317,8 +412,8 @@ class AgentTask(Base):
     entity_type = Column(String(50))  # bom, po
     entity_id = Column(Integer)
     status = Column(String(50), default="pending")  # pending, running, completed, failed, paused
-    input_data = Column(JSONB, default={})
-    output_data = Column(JSONB, default={})
+    input_data = Column(JSONB, nullable=False, server_default=EMPTY_JSONB_OBJECT)
+    output_data = Column(JSONB, nullable=False, server_default=EMPTY_JSONB_OBJECT)
     progress = Column(Float, default=0)  # 0-100
     current_step = Column(String(255))
     current_agent = Column(String(100))  # Which agent is currently active
@@ -327,7 +422,7 @@ class AgentTask(Base):
     started_at = Column(DateTime)
     completed_at = Column(DateTime)
     created_by = Column(Integer, ForeignKey("users.id"))
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(TS, server_default=func.now(), nullable=False)
 
     __table_args__ = (
         Index("idx_agent_tasks_status", "organization_id", "status"),
@@ -347,14 +442,14 @@ class ApprovalRequest(Base):
     request_type = Column(String(100))  # po_approval, match_review, price_review
     title = Column(String(255))
     description = Column(Text)
-    details = Column(JSONB, default={})
+    details = Column(JSONB, nullable=False, server_default=EMPTY_JSONB_OBJECT)
     status = Column(String(50), default="pending")  # pending, approved, rejected, expired
     requested_by = Column(Integer, ForeignKey("users.id"))
     reviewed_by = Column(Integer, ForeignKey("users.id"))
     reviewed_at = Column(DateTime)
     review_notes = Column(Text)
     expires_at = Column(DateTime)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(TS, server_default=func.now(), nullable=False)
 
     __table_args__ = (
         Index("idx_approvals_status", "organization_id", "status"),
@@ -371,10 +466,23 @@ class AgentMemory(Base):
     memory_type = Column(String(50), nullable=False)  # bom_parse, supplier_match, pricing, po_generation
     content = Column(Text, nullable=False)
     summary = Column(Text)
-    embedding = Column(Vector(1536))
+    # FP16 storage halves row and HNSW index size; OpenAI's FP32 vectors are cast on insert
+    embedding = Column(HALFVEC(1536))
     importance = Column(DECIMAL(3, 2), default=0.5)  # 0.0-1.0
     source_entity_type = Column(String(50))  # bom, supplier, part, po
     source_entity_id = Column(Integer)
-    extra_data = Column(JSONB, default={})
-    created_at = Column(DateTime, default=datetime.utcnow)
-    accessed_at = Column(DateTime, default=datetime.utcnow)
+    extra_data = Column(JSONB, nullable=False, server_default=EMPTY_JSONB_OBJECT)
+    created_at = Column(TS, server_default=func.now(), nullable=False)
+    accessed_at = Column(TS, server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        # Cosine HNSW index backing MemoryService searches (<=> operator)
+        Index(
+            "idx_agent_memories_embedding_hnsw",
+            "embedding",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding": "halfvec_cosine_ops"},
+            postgresql_where=text("embedding IS NOT NULL"),
+        ),
+    )
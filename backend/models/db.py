@@ -2,40 +2,74 @@
 Async database session management.
 Production-ready with connection pooling and health checks.
 """
+import functools
+import logging
 import os
+import re
 import ssl
 from contextlib import asynccontextmanager, contextmanager
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Final, Optional
 
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, Session
 
 from config import get_settings
 from models.database import Base
 
+logger = logging.getLogger(__name__)
 settings = get_settings()
 
 # Determine if we need SSL (production/Render)
-_is_production = os.getenv("ENVIRONMENT") == "production" or "render.com" in settings.database_url
+_is_production: Final[bool] = os.getenv("ENVIRONMENT") == "production" or "render.com" in settings.database_url
 
-# SSL configuration for asyncpg
-_async_connect_args = {}
+# Session settings applied once per connection rather than per request:
+# our queries are short OLTP lookups where JIT compilation is pure overhead.
+# plan_cache_mode stays at "auto": a forced generic plan cannot use partial
+# indexes whose predicate compares against a literal (e.g. the
+# status = 'active' HNSW indexes on suppliers), since the value is a bind
+# parameter in the generic plan.
+_SESSION_SETTINGS = {
+    "jit": "off",
+}
+
+# asyncpg connection settings: keep prepared statements cached per connection
+# so repeated ORM queries skip the Parse step
+_async_connect_args = {
+    "statement_cache_size": settings.db_statement_cache_size,
+    "prepared_statement_cache_size": settings.db_statement_cache_size,
+    "server_settings": dict(_SESSION_SETTINGS),
+}
 if _is_production:
     _async_connect_args["ssl"] = "require"
 
-# Async engine for production use
+# Pool sizing: no point holding more connections than the worker can keep busy
+_pool_size = min(settings.db_pool_size, max(4, (os.cpu_count() or 1) * 2))
+_per_worker_budget = settings.db_server_max_connections // max(settings.workers, 1)
+if _pool_size + settings.db_max_overflow > _per_worker_budget:
+    logger.warning(
+        f"DB pool ({_pool_size} + {settings.db_max_overflow} overflow) exceeds the "
+        f"per-worker share of max_connections ({_per_worker_budget} across {settings.workers} workers)"
+    )
+
+# Async engine for production use. LIFO checkout keeps a small set of hot
+# connections (with warm prepared-statement caches) in rotation.
 async_engine = create_async_engine(
     settings.database_url,
-    pool_size=settings.db_pool_size,
+    pool_size=_pool_size,
     max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
     pool_pre_ping=settings.db_pool_pre_ping,
     pool_recycle=settings.db_pool_recycle,
+    pool_use_lifo=True,
+    pool_reset_on_return="rollback",
     echo=settings.debug,
+    query_cache_size=settings.db_query_cache_size,
     connect_args=_async_connect_args,
 )
 
@@ -53,31 +87,82 @@ _sync_connect_args = {}
 if _is_production:
     _sync_connect_args["sslmode"] = "require"
 
-# Sync engine for migrations and seeding
-sync_engine = create_engine(
-    settings.sync_database_url,
-    pool_pre_ping=True,
-    connect_args=_sync_connect_args,
-)
 
-SyncSessionLocal = sessionmaker(
-    autocommit=False,
-    autoflush=False,
-    bind=sync_engine,
-)
+# Sync engine for migrations, seeding and agent workers. Built lazily so
+# async-only API workers never open a psycopg pool.
+@functools.cache
+def get_sync_engine() -> Engine:
+    """Get the sync engine, creating it on first use."""
+    engine = create_engine(
+        settings.sync_database_url,
+        pool_pre_ping=True,
+        connect_args=_sync_connect_args,
+    )
+
+    @event.listens_for(engine, "connect")
+    def _apply_session_settings(dbapi_conn, _connection_record):
+        # Run outside a transaction so the settings persist for the session
+        autocommit = dbapi_conn.autocommit
+        dbapi_conn.autocommit = True
+        cursor = dbapi_conn.cursor()
+        for name, value in _SESSION_SETTINGS.items():
+            cursor.execute(f"SET {name} = {value}")
+        cursor.close()
+        dbapi_conn.autocommit = autocommit
+
+    return engine
+
+
+@functools.cache
+def _sync_session_factory() -> sessionmaker:
+    """Get the sync session factory, creating it on first use."""
+    return sessionmaker(
+        autocommit=False,
+        autoflush=False,
+        bind=get_sync_engine(),
+    )
+
+
+def _updated_at_trigger_ddl() -> list:
+    """DDL keeping updated_at current on every table that has the column."""
+    statements = [text(
+        "CREATE OR REPLACE FUNCTION set_updated_at() RETURNS trigger AS $$ "
+        "BEGIN NEW.updated_at = now(); RETURN NEW; END $$ LANGUAGE plpgsql"
+    )]
+    for table in Base.metadata.sorted_tables:
+        if "updated_at" in table.c:
+            statements.append(text(
+                f"CREATE OR REPLACE TRIGGER trg_{table.name}_updated_at "
+                f"BEFORE UPDATE ON {table.name} "
+                f"FOR EACH ROW EXECUTE FUNCTION set_updated_at()"
+            ))
+    return statements
+
+
+# pgvector for embeddings, pg_trgm for fuzzy part number matching
+_EXTENSIONS = ("vector", "pg_trgm")
 
 
 async def init_db() -> None:
     """Initialize database tables (async)."""
     async with async_engine.begin() as conn:
-        # Enable pgvector extension (required for embeddings)
-        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+        for extension in _EXTENSIONS:
+            await conn.execute(text(f"CREATE EXTENSION IF NOT EXISTS {extension}"))
         await conn.run_sync(Base.metadata.create_all)
+        for statement in _updated_at_trigger_ddl():
+            await conn.execute(statement)
 
 
 def init_db_sync() -> None:
     """Initialize database tables (sync, for migrations)."""
-    Base.metadata.create_all(bind=sync_engine)
+    engine = get_sync_engine()
+    with engine.begin() as conn:
+        for extension in _EXTENSIONS:
+            conn.execute(text(f"CREATE EXTENSION IF NOT EXISTS {extension}"))
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for statement in _updated_at_trigger_ddl():
+            conn.execute(statement)
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
@@ -93,11 +178,78 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
+_WORK_MEM_RE = re.compile(r"^\d+\s*(kB|MB|GB)$")
+_ITERATIVE_SCAN_MODES = frozenset({"off", "strict_order", "relaxed_order"})
+# pgvector gained hnsw.iterative_scan / hnsw.max_scan_tuples in 0.8; older
+# releases reject them under the reserved hnsw. prefix
+_ITERATIVE_SCAN_MIN_VERSION = (0, 8)
+# Whether the installed pgvector supports iterative scans (checked once)
+_iterative_scan_supported: Optional[bool] = None
+
+
+async def _supports_iterative_scan(session: AsyncSession) -> bool:
+    """Check once per process whether pgvector is new enough for iterative scans."""
+    global _iterative_scan_supported
+    if _iterative_scan_supported is None:
+        version = (await session.execute(
+            text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+        )).scalar()
+        try:
+            parsed = tuple(int(part) for part in version.split(".")[:2])
+        except (AttributeError, ValueError):
+            parsed = (0, 0)
+        _iterative_scan_supported = parsed >= _ITERATIVE_SCAN_MIN_VERSION
+        if not _iterative_scan_supported:
+            logger.info(f"pgvector {version} has no HNSW iterative scan; skipping hnsw.iterative_scan")
+    return _iterative_scan_supported
+
+
+async def configure_vector_session(
+    session: AsyncSession,
+    ef_search: Optional[int] = None,
+    work_mem: Optional[str] = None,
+) -> None:
+    """
+    Tune the current transaction for HNSW vector search.
+
+    Raises hnsw.ef_search so filtered queries keep enough candidates for
+    recall, and work_mem so the planner keeps the index scan instead of
+    falling back to a sequential scan + sort. With hnsw.iterative_scan on,
+    a scan whose candidates are mostly removed by the tenant filter keeps
+    walking the graph instead of returning short, bounded by
+    hnsw.max_scan_tuples. Keep similarity thresholds out of the scanned
+    query (filter a MATERIALIZED ordered CTE instead), or a query with no
+    qualifying rows walks up to that bound. The iterative scan settings
+    are skipped on pgvector older than 0.8. All are SET LOCAL and reset
+    when the transaction ends.
+    """
+    ef_search = int(ef_search or settings.hnsw_ef_search)
+    work_mem = work_mem or settings.vector_work_mem
+    if not _WORK_MEM_RE.match(work_mem):
+        raise ValueError(f"Invalid work_mem value: {work_mem!r}")
+    iterative_scan = settings.hnsw_iterative_scan
+    if iterative_scan not in _ITERATIVE_SCAN_MODES:
+        raise ValueError(f"Invalid hnsw.iterative_scan value: {iterative_scan!r}")
+
+    await session.execute(text(f"SET LOCAL hnsw.ef_search = {ef_search}"))
+    await session.execute(text(f"SET LOCAL work_mem = '{work_mem}'"))
+    if iterative_scan != "off" and await _supports_iterative_scan(session):
+        await session.execute(text(f"SET LOCAL hnsw.iterative_scan = {iterative_scan}"))
+        await session.execute(text(f"SET LOCAL hnsw.max_scan_tuples = {int(settings.hnsw_max_scan_tuples)}"))
+
+
 @asynccontextmanager
-async def get_db_context() -> AsyncGenerator[AsyncSession, None]:
-    """Context manager for async database session."""
+async def get_db_context(ef_search: Optional[int] = None) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Context manager for async database session.
+
+    Pass ef_search for HNSW-heavy work; the session is then tuned with
+    configure_vector_session() before it is handed out.
+    """
     async with AsyncSessionLocal() as session:
         try:
+            if ef_search is not None:
+                await configure_vector_session(session, ef_search=ef_search)
             yield session
             await session.commit()
         except Exception:
@@ -110,13 +262,13 @@ async def get_db_context() -> AsyncGenerator[AsyncSession, None]:
 # Sync versions for migrations and seeding scripts
 def get_sync_db() -> Session:
     """Get sync database session for migrations/seeding."""
-    return SyncSessionLocal()
+    return _sync_session_factory()()
 
 
 @contextmanager
 def get_sync_db_context():
     """Context manager for sync database session."""
-    db = SyncSessionLocal()
+    db = _sync_session_factory()()
     try:
         yield db
         db.commit()
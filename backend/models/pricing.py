@@ -0,0 +1,32 @@
+"""
+Supplier part price-break encoding.
+
+Quantity tiers are the same for every supplier part, so price_breaks is
+stored compactly as a list of prices aligned with PRICE_BREAK_QUANTITIES
+(e.g. ``[0.10, 0.095, 0.088, 0.08]``) rather than a list of
+``{"quantity": ..., "price": ...}`` objects.
+"""
+from typing import Any
+
+# Minimum order quantity of each price tier
+PRICE_BREAK_QUANTITIES = (1, 10, 100, 1000)
+
+# Default multiplier on base price for each tier in PRICE_BREAK_QUANTITIES
+PRICE_BREAK_MULTIPLIERS = (1.0, 0.95, 0.88, 0.80)
+
+
+def expand_price_breaks(price_breaks: list[Any] | None) -> list[dict]:
+    """
+    Expand stored price breaks into ``{"quantity", "price"}`` dicts.
+
+    Accepts the compact price list as well as the legacy list-of-dicts
+    format, which is returned unchanged.
+    """
+    if not price_breaks:
+        return []
+    if isinstance(price_breaks[0], dict):
+        return price_breaks
+    return [
+        {"quantity": quantity, "price": price}
+        for quantity, price in zip(PRICE_BREAK_QUANTITIES, price_breaks)
+    ]
@@ -4,7 +4,9 @@ Pydantic schemas for API request/response models.
 from datetime import datetime, date
 from decimal import Decimal
 from typing import Optional
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, field_validator
+
+from models.pricing import expand_price_breaks
 
 
 # ============ Base Schemas ============
@@ -99,6 +101,11 @@ class SupplierPartBase(BaseModel):
     is_preferred: bool = False
     price_breaks: list[dict] = []
 
+    @field_validator("price_breaks", mode="before")
+    @classmethod
+    def _expand_price_breaks(cls, v):
+        return expand_price_breaks(v)
+
 
 class SupplierPartCreate(SupplierPartBase):
     supplier_id: int
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Create per-organization partial HNSW indexes for supplier embeddings.
+
+Large tenants get their own index restricted to
+``organization_id = <id> AND status = 'active'`` so vector search for that
+tenant is a pure index scan instead of post-filtering the shared index.
+
+Usage:
+    python scripts/create_org_vector_indexes.py [--min-suppliers 5000]
+
+Or with Docker:
+    docker-compose exec backend python scripts/create_org_vector_indexes.py
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import text
+from models.db import get_sync_engine
+
+
+def large_organizations(conn, min_suppliers: int) -> list[int]:
+    """Return IDs of organizations with at least min_suppliers active suppliers."""
+    result = conn.execute(
+        text(
+            "SELECT organization_id FROM suppliers "
+            "WHERE status = 'active' AND description_embedding IS NOT NULL "
+            "GROUP BY organization_id HAVING count(*) >= :min_suppliers"
+        ),
+        {"min_suppliers": min_suppliers},
+    )
+    return [row[0] for row in result]
+
+
+def create_org_index(conn, org_id: int) -> None:
+    """Create the partial HNSW index for one organization."""
+    org_id = int(org_id)
+    conn.execute(text(
+        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_suppliers_hnsw_org_{org_id} "
+        f"ON suppliers USING hnsw (description_embedding vector_cosine_ops) "
+        f"WHERE organization_id = {org_id} AND status = 'active'"
+    ))
+
+
+def main():
+    """Create missing per-organization supplier vector indexes."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--min-suppliers",
+        type=int,
+        default=5000,
+        help="Only index organizations with at least this many active suppliers",
+    )
+    args = parser.parse_args()
+
+    # CREATE INDEX CONCURRENTLY must run outside a transaction
+    with get_sync_engine().connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        org_ids = large_organizations(conn, args.min_suppliers)
+        if not org_ids:
+            print("No organizations above threshold.")
+            return
+
+        for org_id in org_ids:
+            print(f"Creating index for organization {org_id}...")
+            create_org_index(conn, org_id)
+
+    print(f"Done. {len(org_ids)} organization index(es) ensured.")
+
+
+if __name__ == "__main__":
+    main()
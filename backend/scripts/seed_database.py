@@ -10,22 +10,32 @@ Seeds the database with:
 - Approval requests
 
 Usage:
-    python scripts/seed_database.py
+    python scripts/seed_database.py [--quiet]
 
 Or with Docker:
     docker-compose exec backend python scripts/seed_database.py
 """
-import json
+import argparse
 import os
 import sys
+from collections import defaultdict
 from datetime import datetime, timedelta
+from itertools import chain
 from pathlib import Path
+from typing import Iterator
 import random
 
+import ijson
+import numpy as np
+import orjson
+from tqdm import tqdm
+
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from sqlalchemy import text
+from psycopg.types.json import Jsonb
+from sqlalchemy import insert, text
+from sqlalchemy.dialects.postgresql import JSONB
 from models.db import get_sync_db_context, init_db_sync
 from models.database import (
     Organization,
@@ -39,6 +49,7 @@ from models.database import (
     AgentTask,
     ApprovalRequest,
 )
+from models.pricing import PRICE_BREAK_MULTIPLIERS
 from config import get_settings
 
 settings = get_settings()
@@ -47,6 +58,17 @@ settings = get_settings()
 DATA_DIR = Path(__file__).parent.parent.parent / "data" / "seed_data"
 DEMO_BOMS_DIR = Path(__file__).parent.parent.parent / "data" / "demo_boms"
 
+# Generated volume pricing multipliers, one per PRICE_BREAK_QUANTITIES tier
+PRICE_BREAK_DISCOUNTS = np.array(PRICE_BREAK_MULTIPLIERS)
+
+# Set by --quiet; suppresses progress bars
+QUIET = False
+
+
+def progress(iterable, desc: str, total: int | None = None):
+    """Wrap an iterable in a progress bar unless running with --quiet."""
+    return tqdm(iterable, desc=f"  {desc}", total=total, disable=QUIET, leave=False)
+
 
 def load_json(filename: str) -> list:
     """Load JSON file from seed data directory."""
@@ -54,8 +76,60 @@ def load_json(filename: str) -> list:
     if not filepath.exists():
         print(f"Warning: {filepath} not found")
         return []
-    with open(filepath) as f:
-        return json.load(f)
+    return orjson.loads(filepath.read_bytes())
+
+
+def iter_json(filename: str) -> Iterator[dict]:
+    """Stream records from a JSON array file without loading it whole."""
+    filepath = DATA_DIR / filename
+    if not filepath.exists():
+        print(f"Warning: {filepath} not found")
+        return
+    with open(filepath, "rb") as f:
+        yield from ijson.items(f, "item", use_float=True)
+
+
+def parse_iso(value: str | None) -> datetime | None:
+    """Parse an ISO 8601 timestamp; Python 3.11+ accepts the "Z" suffix."""
+    return datetime.fromisoformat(value) if value else None
+
+
+def copy_rows(db, model, rows: list[dict]) -> None:
+    """
+    Bulk load rows into a model's table.
+
+    Uses COPY FROM STDIN on PostgreSQL, which skips per-row statement
+    parsing; other dialects fall back to an executemany INSERT. All rows
+    must have the same keys. COPY bypasses SQLAlchemy, so omitted columns
+    with a scalar Python-side default (e.g. default=0) are filled in here;
+    the rest get their server defaults.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        db.execute(insert(model), rows)
+        return
+
+    table = model.__table__
+    columns = list(rows[0])
+    defaults = {
+        column.name: column.default.arg
+        for column in table.c
+        if column.name not in rows[0]
+        and column.default is not None
+        and column.default.is_scalar
+    }
+    columns.extend(defaults)
+    json_columns = {name for name in columns if isinstance(table.c[name].type, JSONB)}
+
+    # Raw psycopg connection of the session's current transaction
+    raw = db.connection().connection
+    with raw.cursor() as cur:
+        with cur.copy(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN") as copy:
+            for row in rows:
+                values = {**defaults, **row}
+                copy.write_row([
+                    Jsonb(values[name]) if name in json_columns else values[name]
+                    for name in columns
+                ])
 
 
 def clear_database(db):
@@ -73,11 +147,15 @@ def clear_database(db):
         "suppliers",
         "organizations",
     ]
-    for table in tables:
-        try:
-            db.execute(text(f"DELETE FROM {table}"))
-        except Exception as e:
-            print(f"  Warning: Could not clear {table}: {e}")
+    if db.get_bind().dialect.name == "postgresql":
+        # One statement, no row scan, and sequences restart at 1
+        db.execute(text(f"TRUNCATE TABLE {', '.join(tables)} RESTART IDENTITY CASCADE"))
+    else:
+        for table in tables:
+            try:
+                db.execute(text(f"DELETE FROM {table}"))
+            except Exception as e:
+                print(f"  Warning: Could not clear {table}: {e}")
     db.commit()
     print("  Done.")
 
@@ -104,26 +182,30 @@ def seed_suppliers(db, org: Organization) -> dict:
     """Seed suppliers from JSON file."""
     print("Seeding suppliers...")
     suppliers_data = load_json("suppliers.json")
-    suppliers = {}
-
-    for data in suppliers_data:
-        supplier = Supplier(
-            organization_id=org.id,
-            name=data["name"],
-            code=data["code"],
-            description=data.get("description"),
-            contact_email=data.get("contact_email"),
-            contact_phone=data.get("contact_phone"),
-            lead_time_days=data.get("lead_time_days", 5),
-            capabilities=data.get("capabilities", []),
-            certifications=data.get("certifications", []),
-            status="active",
-        )
-        db.add(supplier)
-        db.flush()
-        suppliers[data["code"]] = supplier
-        print(f"  Created: {supplier.name} ({supplier.code})")
+    if not suppliers_data:
+        return {}
+
+    rows = [
+        {
+            "organization_id": org.id,
+            "name": data["name"],
+            "code": data["code"],
+            "description": data.get("description"),
+            "contact_email": data.get("contact_email"),
+            "contact_phone": data.get("contact_phone"),
+            "lead_time_days": data.get("lead_time_days", 5),
+            "capabilities": data.get("capabilities", []),
+            "certifications": data.get("certifications", []),
+            "status": "active",
+        }
+        for data in progress(suppliers_data, "Suppliers")
+    ]
+    result = db.scalars(
+        insert(Supplier).returning(Supplier, sort_by_parameter_order=True), rows
+    )
 
+    suppliers = {supplier.code: supplier for supplier in result}
+    print(f"  Created {len(suppliers)} suppliers")
     return suppliers
 
 
@@ -131,59 +213,62 @@ def seed_parts(db, org: Organization, suppliers: dict) -> dict:
     """Seed parts and supplier-part relationships."""
     print("Seeding parts catalog...")
 
-    # Load both parts files
-    parts_data = load_json("parts.json")
-    parts_extended = load_json("parts_extended.json")
-    all_parts_data = parts_data + parts_extended
+    # Stream both parts files into one map keyed by part number, so the
+    # extended catalog overrides duplicate entries from parts.json
+    unique_parts_data = {
+        data["part_number"]: data
+        for data in chain(iter_json("parts.json"), iter_json("parts_extended.json"))
+    }
+    if not unique_parts_data:
+        return {}
+
+    parts_rows = [
+        {
+            "organization_id": org.id,
+            "part_number": data["part_number"],
+            "name": data["name"],
+            "description": data.get("description"),
+            "category": data.get("category"),
+            "unit_of_measure": data.get("unit_of_measure", "EA"),
+        }
+        for data in progress(unique_parts_data.values(), "Parts")
+    ]
+    result = db.scalars(
+        insert(Part).returning(Part, sort_by_parameter_order=True), parts_rows
+    )
 
-    parts = {}
+    parts = {part.part_number: part for part in result}
 
-    for data in all_parts_data:
-        # Skip if already exists
-        if data["part_number"] in parts:
-            continue
+    # Add supplier-part relationships with pricing
+    offers = [
+        (parts[part_number], supplier, sp_data)
+        for part_number, data in unique_parts_data.items()
+        for sp_data in data.get("suppliers", [])
+        if (supplier := suppliers.get(sp_data["supplier_code"]))
+    ]
 
-        part = Part(
-            organization_id=org.id,
-            part_number=data["part_number"],
-            name=data["name"],
-            description=data.get("description"),
-            category=data.get("category"),
-            unit_of_measure=data.get("unit_of_measure", "EA"),
-        )
-        db.add(part)
-        db.flush()
-        parts[data["part_number"]] = part
-
-        # Add supplier-part relationships with pricing
-        for sp_data in data.get("suppliers", []):
-            supplier = suppliers.get(sp_data["supplier_code"])
-            if supplier:
-                # Generate price breaks
-                base_price = sp_data["price"]
-                price_breaks = [
-                    {"quantity": 1, "price": base_price},
-                    {"quantity": 10, "price": round(base_price * 0.95, 4)},
-                    {"quantity": 100, "price": round(base_price * 0.88, 4)},
-                    {"quantity": 1000, "price": round(base_price * 0.80, 4)},
-                ]
-
-                supplier_part = SupplierPart(
-                    supplier_id=supplier.id,
-                    part_id=part.id,
-                    supplier_part_number=sp_data.get("supplier_pn"),
-                    unit_price=base_price,
-                    currency="USD",
-                    lead_time_days=sp_data.get("lead_time", supplier.lead_time_days),
-                    min_order_qty=sp_data.get("moq", 1),
-                    price_breaks=price_breaks,
-                    is_preferred=sp_data.get("preferred", False),
-                )
-                db.add(supplier_part)
+    # Generate price breaks for every offer in one vectorized pass
+    base_prices = np.array([sp_data["price"] for _, _, sp_data in offers], dtype=np.float64)
+    tiers = np.round(np.outer(base_prices, PRICE_BREAK_DISCOUNTS), 4).tolist()
+
+    supplier_parts_rows = []
+    for (part, supplier, sp_data), price_breaks in progress(zip(offers, tiers), "Supplier parts", len(offers)):
+        supplier_parts_rows.append({
+            "supplier_id": supplier.id,
+            "part_id": part.id,
+            "supplier_part_number": sp_data.get("supplier_pn"),
+            "unit_price": sp_data["price"],
+            "currency": "USD",
+            "lead_time_days": sp_data.get("lead_time", supplier.lead_time_days),
+            "min_order_qty": sp_data.get("moq", 1),
+            "price_breaks": price_breaks,
+            "is_preferred": sp_data.get("preferred", False),
+        })
 
-        print(f"  Created: {part.part_number} - {part.name}")
+    if supplier_parts_rows:
+        copy_rows(db, SupplierPart, supplier_parts_rows)
 
-    db.flush()
+    print(f"  Created {len(parts)} parts with {len(supplier_parts_rows)} supplier offers")
     return parts
 
 
@@ -191,24 +276,37 @@ def seed_boms(db, org: Organization, parts: dict, suppliers: dict) -> list:
     """Seed demo BOMs."""
     print("Seeding demo BOMs...")
     boms_data = load_json("demo_boms.json")
-    boms = []
-
-    for data in boms_data:
-        bom = BOM(
-            organization_id=org.id,
-            name=data["name"],
-            description=data.get("description"),
-            status=data.get("status", "active"),
-            processing_status=data.get("processing_status", "pending"),
-            total_items=data.get("total_items", 0),
-            matched_items=data.get("matched_items", 0),
-            total_cost=data.get("total_cost"),
-            source_file_name=f"{data['name'].lower().replace(' ', '_')}.csv",
-            source_file_type="csv",
-        )
-        db.add(bom)
-        db.flush()
+    if not boms_data:
+        return []
+
+    bom_rows = [
+        {
+            "organization_id": org.id,
+            "name": data["name"],
+            "description": data.get("description"),
+            "status": data.get("status", "active"),
+            "processing_status": data.get("processing_status", "pending"),
+            "total_items": data.get("total_items", 0),
+            "matched_items": data.get("matched_items", 0),
+            "total_cost": data.get("total_cost"),
+            "source_file_name": f"{data['name'].lower().replace(' ', '_')}.csv",
+            "source_file_type": "csv",
+        }
+        for data in boms_data
+    ]
+    boms = db.scalars(
+        insert(BOM).returning(BOM, sort_by_parameter_order=True), bom_rows
+    ).all()
+
+    default_supplier = next(iter(suppliers.values()), None)
+
+    # First supplier part per part, loaded once instead of per BOM item
+    sp_by_part = {}
+    for sp in db.query(SupplierPart).order_by(SupplierPart.id):
+        sp_by_part.setdefault(sp.part_id, sp)
 
+    bom_item_rows = []
+    for bom, data in progress(zip(boms, boms_data), "BOMs", len(boms)):
         # Add BOM items
         for item_data in data.get("items", []):
             part = parts.get(item_data["part_number_raw"])
@@ -217,97 +315,106 @@ def seed_boms(db, org: Organization, parts: dict, suppliers: dict) -> list:
 
             if part and item_data.get("status") == "matched":
                 # Find a supplier part
-                for sp in db.query(SupplierPart).filter(SupplierPart.part_id == part.id).all():
-                    supplier_part = sp
-                    supplier = suppliers.get(list(suppliers.keys())[0])
-                    break
-
-            bom_item = BOMItem(
-                bom_id=bom.id,
-                line_number=item_data["line_number"],
-                part_number_raw=item_data["part_number_raw"],
-                description_raw=item_data.get("description_raw"),
-                quantity=item_data.get("quantity", 1),
-                unit_of_measure="EA",
-                status=item_data.get("status", "pending"),
-                match_confidence=item_data.get("match_confidence"),
-                match_method="auto" if item_data.get("match_confidence", 0) > 0.8 else None,
-                part_id=part.id if part else None,
-                matched_supplier_id=supplier.id if supplier else None,
-                matched_supplier_part_id=supplier_part.id if supplier_part else None,
-                unit_cost=supplier_part.unit_price if supplier_part else None,
-            )
-            db.add(bom_item)
-
-        boms.append(bom)
-        print(f"  Created: {bom.name} ({len(data.get('items', []))} items)")
-
-    db.flush()
-    return boms
+                supplier_part = sp_by_part.get(part.id)
+                if supplier_part:
+                    supplier = default_supplier
+
+            bom_item_rows.append({
+                "bom_id": bom.id,
+                "line_number": item_data["line_number"],
+                "part_number_raw": item_data["part_number_raw"],
+                "description_raw": item_data.get("description_raw"),
+                "quantity": item_data.get("quantity", 1),
+                "unit_of_measure": "EA",
+                "status": item_data.get("status", "pending"),
+                "match_confidence": item_data.get("match_confidence"),
+                "match_method": "auto" if item_data.get("match_confidence", 0) > 0.8 else None,
+                "part_id": part.id if part else None,
+                "matched_supplier_id": supplier.id if supplier else None,
+                "matched_supplier_part_id": supplier_part.id if supplier_part else None,
+                "unit_cost": supplier_part.unit_price if supplier_part else None,
+            })
+
+    if bom_item_rows:
+        copy_rows(db, BOMItem, bom_item_rows)
+
+    print(f"  Created {len(boms)} BOMs with {len(bom_item_rows)} items")
+    return list(boms)
 
 
 def seed_purchase_orders(db, org: Organization, suppliers: dict, parts: dict) -> list:
     """Seed demo purchase orders."""
     print("Seeding purchase orders...")
     pos_data = load_json("demo_purchase_orders.json")
-    pos = []
 
+    po_rows = []
+    po_items_data = []
     for data in pos_data:
         supplier = suppliers.get(data["supplier_code"])
         if not supplier:
             print(f"  Warning: Supplier {data['supplier_code']} not found, skipping PO")
             continue
 
-        po = PurchaseOrder(
-            organization_id=org.id,
-            supplier_id=supplier.id,
-            po_number=data["po_number"],
-            status=data.get("status", "draft"),
-            total=data.get("total", 0),
-            currency=data.get("currency", "USD"),
-            notes=data.get("notes"),
-            approved_at=datetime.fromisoformat(data["approved_at"].replace("Z", "+00:00")) if data.get("approved_at") else None,
-            sent_at=datetime.fromisoformat(data["sent_at"].replace("Z", "+00:00")) if data.get("sent_at") else None,
-        )
-        db.add(po)
-        db.flush()
+        po_rows.append({
+            "organization_id": org.id,
+            "supplier_id": supplier.id,
+            "po_number": data["po_number"],
+            "status": data.get("status", "draft"),
+            "total": data.get("total", 0),
+            "currency": data.get("currency", "USD"),
+            "notes": data.get("notes"),
+            "approved_at": parse_iso(data.get("approved_at")),
+            "sent_at": parse_iso(data.get("sent_at")),
+        })
+        po_items_data.append(data.get("items", []))
+
+    if not po_rows:
+        return []
 
+    pos = db.scalars(
+        insert(PurchaseOrder).returning(PurchaseOrder, sort_by_parameter_order=True), po_rows
+    ).all()
+
+    po_item_rows = []
+    for po, items_data in progress(zip(pos, po_items_data), "Purchase orders", len(pos)):
         # Add PO items
-        for idx, item_data in enumerate(data.get("items", []), start=1):
+        for idx, item_data in enumerate(items_data, start=1):
             part = parts.get(item_data.get("part_number"))
 
-            po_item = POItem(
-                po_id=po.id,
-                line_number=item_data.get("line_number", idx),
-                part_id=part.id if part else None,
-                part_number=item_data.get("part_number"),
-                quantity=item_data["quantity"],
-                unit_price=item_data["unit_price"],
-                extended_price=item_data.get("line_total", item_data["quantity"] * item_data["unit_price"]),
-            )
-            db.add(po_item)
+            po_item_rows.append({
+                "po_id": po.id,
+                "line_number": item_data.get("line_number", idx),
+                "part_id": part.id if part else None,
+                "part_number": item_data.get("part_number"),
+                "quantity": item_data["quantity"],
+                "unit_price": item_data["unit_price"],
+                "extended_price": item_data.get("line_total", item_data["quantity"] * item_data["unit_price"]),
+            })
 
-        pos.append(po)
-        print(f"  Created: {po.po_number} - ${po.total:.2f} ({po.status})")
+    if po_item_rows:
+        copy_rows(db, POItem, po_item_rows)
 
-    db.flush()
-    return pos
+    print(f"  Created {len(pos)} purchase orders with {len(po_item_rows)} items")
+    return list(pos)
 
 
 def seed_approval_requests(db, org: Organization, pos: list, boms: list):
     """Create approval requests for pending items."""
     print("Creating approval requests...")
+    created = 0
+    threshold = settings.po_approval_threshold
+    threshold_str = f"${threshold:,.2f}"
 
     # PO approval for pending POs over threshold
     for po in pos:
-        if po.status == "pending" and po.total > settings.po_approval_threshold:
+        if po.status == "pending" and po.total > threshold:
             approval = ApprovalRequest(
                 organization_id=org.id,
                 entity_type="purchase_order",
                 entity_id=po.id,
                 request_type="po_approval",
                 title=f"PO Approval: {po.po_number}",
-                description=f"Purchase order {po.po_number} exceeds approval threshold of ${settings.po_approval_threshold:,.2f}",
+                description=f"Purchase order {po.po_number} exceeds approval threshold of {threshold_str}",
                 status="pending",
                 details={
                     "po_number": po.po_number,
@@ -317,11 +424,15 @@ def seed_approval_requests(db, org: Organization, pos: list, boms: list):
                 },
             )
             db.add(approval)
-            print(f"  Created approval request for {po.po_number}")
+            created += 1
 
     # Supplier match approvals for low-confidence matches
+    items_by_bom = defaultdict(list)
+    for item in db.query(BOMItem).order_by(BOMItem.id):
+        items_by_bom[item.bom_id].append(item)
+
     for bom in boms:
-        for item in db.query(BOMItem).filter(BOMItem.bom_id == bom.id).all():
+        for item in items_by_bom[bom.id]:
             if item.status == "pending_review" or (item.match_confidence and item.match_confidence < 0.8):
                 confidence_str = f"{item.match_confidence:.0%}" if item.match_confidence else "0%"
                 approval = ApprovalRequest(
@@ -339,14 +450,20 @@ def seed_approval_requests(db, org: Organization, pos: list, boms: list):
                     },
                 )
                 db.add(approval)
-                print(f"  Created approval request for {item.part_number_raw}")
+                created += 1
 
     db.flush()
+    print(f"  Created {created} approval requests")
 
 
 def seed_agent_tasks(db, org: Organization, boms: list):
     """Create sample agent tasks showing workflow history."""
     print("Creating agent task history...")
+    created = 0
+    now = datetime.utcnow()
+    completed_started_at = now - timedelta(hours=2)
+    completed_finished_at = now - timedelta(hours=1, minutes=45)
+    running_started_at = now - timedelta(minutes=15)
 
     for bom in boms:
         if bom.processing_status == "completed":
@@ -365,11 +482,11 @@ def seed_agent_tasks(db, org: Organization, boms: list):
                     "items_matched": bom.matched_items,
                     "total_cost": float(bom.total_cost) if bom.total_cost else 0,
                 },
-                started_at=datetime.utcnow() - timedelta(hours=2),
-                completed_at=datetime.utcnow() - timedelta(hours=1, minutes=45),
+                started_at=completed_started_at,
+                completed_at=completed_finished_at,
             )
             db.add(task)
-            print(f"  Created completed task for {bom.name}")
+            created += 1
 
         elif bom.processing_status == "matching":
             # Create in-progress task
@@ -382,16 +499,23 @@ def seed_agent_tasks(db, org: Organization, boms: list):
                 progress=65,
                 current_step="matching",
                 input_data={"bom_id": bom.id},
-                started_at=datetime.utcnow() - timedelta(minutes=15),
+                started_at=running_started_at,
             )
             db.add(task)
-            print(f"  Created in-progress task for {bom.name}")
+            created += 1
 
     db.flush()
+    print(f"  Created {created} agent tasks")
 
 
 def main():
     """Main seeding function."""
+    global QUIET
+
+    parser = argparse.ArgumentParser(description="Seed the Procura demo database")
+    parser.add_argument("--quiet", action="store_true", help="Disable progress bars")
+    QUIET = parser.parse_args().quiet
+
     print("=" * 60)
     print("Procura Database Seeding Script")
     print("=" * 60)
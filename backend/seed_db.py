@@ -1,18 +1,118 @@
 """
 Seed database with demo data.
 """
-import json
 import asyncio
+import hashlib
+import json
+import os
 from pathlib import Path
 from decimal import Decimal
 
+from models.bulk import bulk_upsert_parts_sync, bulk_upsert_supplier_parts_sync
 from models.db import get_sync_db_context, init_db_sync
 from models.database import Organization, Supplier, Part, SupplierPart, BOM, BOMItem, PurchaseOrder, POItem
-from services.embedding import get_embedding_service
+from services.embedding import get_embedding_service, normalize_embedding
 from config import get_settings
 
 settings = get_settings()
 
+# OpenAI accepts up to 2048 inputs per embeddings request
+EMBEDDING_BATCH_SIZE = 2048
+# Maximum embedding requests in flight at once
+EMBEDDING_CONCURRENCY = 20
+# Persistent embedding cache so repeat seeds skip unchanged descriptions
+EMBEDDING_CACHE_PATH = Path(
+    os.environ.get("EMBEDDING_CACHE_PATH", Path(__file__).parent / ".embedding_cache.json")
+)
+
+
+def load_embedding_cache() -> dict:
+    """Load the on-disk embedding cache, or start empty if missing/corrupt."""
+    try:
+        with open(EMBEDDING_CACHE_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_embedding_cache(cache: dict) -> None:
+    """Persist the embedding cache atomically (write temp file, then rename)."""
+    tmp_path = EMBEDDING_CACHE_PATH.with_name(EMBEDDING_CACHE_PATH.name + ".tmp")
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, EMBEDDING_CACHE_PATH)
+    except OSError as e:
+        print(f"Warning: Could not save embedding cache: {e}")
+
+
+def embedding_cache_key(embedding_service, text: str) -> str:
+    """Cache key for a text under the service's model and dimensions."""
+    raw = f"{embedding_service.model}:{embedding_service.dimensions}:{text}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def embed_descriptions(embedding_service, descriptions: dict, cache: dict | None = None) -> dict:
+    """
+    Embed descriptions keyed by an identifier.
+
+    Batches are sent concurrently; if a batch request fails, its texts are
+    retried as individual concurrent requests.
+
+    Args:
+        embedding_service: EmbeddingService instance, or None to skip
+        descriptions: Mapping of key -> non-empty description text
+        cache: Optional embedding cache; hits skip the API and new
+            embeddings are added to it
+
+    Returns:
+        Mapping of key -> embedding vector for every text that succeeded
+    """
+    if not embedding_service or not descriptions:
+        return {}
+
+    cached = {}
+    if cache is not None:
+        cache_keys = {key: embedding_cache_key(embedding_service, text) for key, text in descriptions.items()}
+        cached = {key: cache[ck] for key, ck in cache_keys.items() if ck in cache}
+
+    keys = [key for key in descriptions if key not in cached]
+    if not keys:
+        return cached
+    batches = [keys[i:i + EMBEDDING_BATCH_SIZE] for i in range(0, len(keys), EMBEDDING_BATCH_SIZE)]
+
+    async def embed_all() -> dict:
+        # Single-text fallback uses the sync client, so it runs in a worker thread
+        sem = asyncio.Semaphore(EMBEDDING_CONCURRENCY)
+
+        async def embed_one(key):
+            async with sem:
+                try:
+                    return key, await asyncio.to_thread(embedding_service.create_embedding, descriptions[key])
+                except Exception as e:
+                    print(f"Warning: Failed to create embedding for {key}: {e}")
+                    return key, None
+
+        async def embed_batch(batch):
+            try:
+                async with sem:
+                    vectors = await embedding_service.create_embeddings_batch(
+                        [descriptions[k] for k in batch]
+                    )
+                return list(zip(batch, vectors))
+            except Exception as e:
+                print(f"Warning: Batch embedding failed ({e}), embedding {len(batch)} texts individually")
+                return await asyncio.gather(*(embed_one(k) for k in batch))
+
+        results = await asyncio.gather(*(embed_batch(batch) for batch in batches))
+        return {key: vector for pairs in results for key, vector in pairs if vector is not None}
+
+    embeddings = asyncio.run(embed_all())
+    if cache is not None:
+        for key, vector in embeddings.items():
+            cache[cache_keys[key]] = vector
+    return {**cached, **embeddings}
+
 
 def seed_database():
     """Seed the database with demo suppliers and parts."""
@@ -35,30 +135,45 @@ def seed_database():
         print("Warning: seed_data directory not found!")
         return
 
+    # One transaction for the whole seed; get_sync_db_context commits on exit
+    # and flush() assigns primary keys without forcing a WAL sync per row
     with get_sync_db_context() as db:
         # Create demo organization
         org = db.query(Organization).filter(Organization.name == "Demo Organization").first()
         if not org:
             org = Organization(name="Demo Organization")
             db.add(org)
-            db.commit()
-            db.refresh(org)
+            db.flush()
             print(f"Created organization: {org.name}")
 
+        embedding_service = None
+        embedding_cache = None
+        if settings.openai_api_key:
+            embedding_service = get_embedding_service()
+            embedding_cache = load_embedding_cache()
+
         # Load and seed suppliers
         suppliers_file = data_dir / "suppliers.json"
         if suppliers_file.exists():
             with open(suppliers_file) as f:
                 suppliers_data = json.load(f)
 
-            embedding_service = None
-            if settings.openai_api_key:
-                embedding_service = get_embedding_service()
+            existing_suppliers = {
+                s.code: s for s in db.query(Supplier).filter(
+                    Supplier.code.in_([s_data["code"] for s_data in suppliers_data])
+                )
+            }
+            supplier_embeddings = embed_descriptions(embedding_service, {
+                s_data["code"]: s_data["description"].strip()
+                for s_data in suppliers_data
+                if s_data["code"] not in existing_suppliers
+                and (s_data.get("description") or "").strip()
+            }, embedding_cache)
 
             supplier_map = {}
             for s_data in suppliers_data:
                 # Check if exists
-                existing = db.query(Supplier).filter(Supplier.code == s_data["code"]).first()
+                existing = existing_suppliers.get(s_data["code"])
                 if existing:
                     supplier_map[s_data["code"]] = existing
                     print(f"Supplier already exists: {s_data['name']}")
@@ -75,19 +190,11 @@ def seed_database():
                     capabilities=s_data.get("capabilities", []),
                     certifications=s_data.get("certifications", []),
                     status="active",
+                    description_embedding=supplier_embeddings.get(s_data["code"]),
                 )
 
-                # Generate embedding for description
-                if embedding_service and s_data.get("description"):
-                    try:
-                        embedding = asyncio.run(embedding_service.create_embedding(s_data["description"]))
-                        supplier.description_embedding = embedding
-                    except Exception as e:
-                        print(f"Warning: Failed to create embedding for {s_data['name']}: {e}")
-
                 db.add(supplier)
-                db.commit()
-                db.refresh(supplier)
+                db.flush()
                 supplier_map[s_data["code"]] = supplier
                 print(f"Created supplier: {supplier.name}")
 
@@ -97,67 +204,73 @@ def seed_database():
             with open(parts_file) as f:
                 parts_data = json.load(f)
 
-            for p_data in parts_data:
-                # Check if exists
-                existing = db.query(Part).filter(
+            existing_parts = {
+                p.part_number: p for p in db.query(Part).filter(
                     Part.organization_id == org.id,
-                    Part.part_number == p_data["part_number"]
-                ).first()
-
-                if existing:
-                    part = existing
+                    Part.part_number.in_([p_data["part_number"] for p_data in parts_data])
+                )
+            }
+            part_embeddings = embed_descriptions(embedding_service, {
+                p_data["part_number"]: p_data["description"].strip()
+                for p_data in parts_data
+                if p_data["part_number"] not in existing_parts
+                and (p_data.get("description") or "").strip()
+            }, embedding_cache)
+
+            # New parts go in with one multi-row upsert per chunk
+            part_rows = []
+            for p_data in parts_data:
+                if p_data["part_number"] in existing_parts:
                     print(f"Part already exists: {p_data['name']}")
-                else:
-                    part = Part(
-                        organization_id=org.id,
-                        part_number=p_data["part_number"],
-                        name=p_data["name"],
-                        description=p_data.get("description"),
-                        category=p_data.get("category"),
-                        unit_of_measure=p_data.get("unit_of_measure", "EA"),
-                    )
-
-                    # Generate embedding
-                    if embedding_service and p_data.get("description"):
-                        try:
-                            embedding = asyncio.run(embedding_service.create_embedding(p_data["description"]))
-                            part.description_embedding = embedding
-                        except Exception as e:
-                            print(f"Warning: Failed to create embedding for {p_data['name']}: {e}")
-
-                    db.add(part)
-                    db.commit()
-                    db.refresh(part)
-                    print(f"Created part: {part.name}")
-
-                # Add supplier relationships
+                    continue
+                # Parts are searched by inner product, so store unit vectors
+                embedding = part_embeddings.get(p_data["part_number"])
+                part_rows.append({
+                    "organization_id": org.id,
+                    "part_number": p_data["part_number"],
+                    "name": p_data["name"],
+                    "description": p_data.get("description"),
+                    "category": p_data.get("category"),
+                    "unit_of_measure": p_data.get("unit_of_measure", "EA"),
+                    "description_embedding": normalize_embedding(embedding) if embedding is not None else None,
+                })
+            if part_rows:
+                bulk_upsert_parts_sync(db, part_rows)
+                for row in part_rows:
+                    print(f"Created part: {row['name']}")
+
+            part_ids = dict(db.query(Part.part_number, Part.id).filter(
+                Part.organization_id == org.id,
+                Part.part_number.in_([p_data["part_number"] for p_data in parts_data]),
+            ))
+            existing_links = set(db.query(SupplierPart.supplier_id, SupplierPart.part_id).filter(
+                SupplierPart.part_id.in_(list(part_ids.values()))
+            ))
+
+            # Add supplier relationships that don't exist yet
+            supplier_part_rows = []
+            for p_data in parts_data:
+                part_id = part_ids[p_data["part_number"]]
                 for sp_data in p_data.get("suppliers", []):
                     supplier = supplier_map.get(sp_data["supplier_code"])
                     if not supplier:
                         print(f"Warning: Supplier {sp_data['supplier_code']} not found")
                         continue
-
-                    # Check if relationship exists
-                    existing_sp = db.query(SupplierPart).filter(
-                        SupplierPart.supplier_id == supplier.id,
-                        SupplierPart.part_id == part.id
-                    ).first()
-
-                    if existing_sp:
+                    if (supplier.id, part_id) in existing_links:
                         continue
-
-                    supplier_part = SupplierPart(
-                        supplier_id=supplier.id,
-                        part_id=part.id,
-                        supplier_part_number=sp_data.get("supplier_pn"),
-                        unit_price=Decimal(str(sp_data["price"])),
-                        lead_time_days=sp_data.get("lead_time"),
-                        min_order_qty=sp_data.get("moq", 1),
-                        is_preferred=sp_data.get("preferred", False),
-                    )
-                    db.add(supplier_part)
-
-                db.commit()
+                    existing_links.add((supplier.id, part_id))
+
+                    supplier_part_rows.append({
+                        "supplier_id": supplier.id,
+                        "part_id": part_id,
+                        "supplier_part_number": sp_data.get("supplier_pn"),
+                        "unit_price": Decimal(str(sp_data["price"])),
+                        "lead_time_days": sp_data.get("lead_time"),
+                        "min_order_qty": sp_data.get("moq", 1),
+                        "is_preferred": sp_data.get("preferred", False),
+                    })
+            if supplier_part_rows:
+                bulk_upsert_supplier_parts_sync(db, supplier_part_rows)
 
         # Load and seed BOMs
         boms_file = data_dir / "demo_boms.json"
@@ -188,8 +301,7 @@ def seed_database():
                     total_cost=Decimal(str(b_data["total_cost"])) if b_data.get("total_cost") else None,
                 )
                 db.add(bom)
-                db.commit()
-                db.refresh(bom)
+                db.flush()
                 boms_count += 1
                 print(f"Created BOM: {bom.name}")
 
@@ -205,7 +317,6 @@ def seed_database():
                         match_confidence=Decimal(str(item_data["match_confidence"])) if item_data.get("match_confidence") else None,
                     )
                     db.add(bom_item)
-                db.commit()
 
         # Load and seed Purchase Orders
         pos_file = data_dir / "demo_purchase_orders.json"
@@ -241,8 +352,7 @@ def seed_database():
                     requires_approval=po_data.get("status") == "pending",
                 )
                 db.add(po)
-                db.commit()
-                db.refresh(po)
+                db.flush()
                 pos_count += 1
                 print(f"Created PO: {po.po_number}")
 
@@ -257,7 +367,9 @@ def seed_database():
                         extended_price=Decimal(str(item_data["line_total"])) if item_data.get("line_total") else None,
                     )
                     db.add(po_item)
-                db.commit()
+
+    if embedding_cache is not None:
+        save_embedding_cache(embedding_cache)
 
     print("\nDatabase seeding complete!")
     print(f"- Organization: Demo Organization")
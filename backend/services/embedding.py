@@ -1,25 +1,111 @@
 """
 Embedding service for vector generation.
 """
+import asyncio
+import hashlib
 import logging
-from functools import lru_cache
+import threading
+from collections import OrderedDict
+from typing import Optional
 
-from openai import OpenAI
+import numpy as np
+from openai import APIConnectionError, AsyncOpenAI, InternalServerError, OpenAI, RateLimitError
+from tenacity import AsyncRetrying, retry_if_exception_type, stop_after_attempt, wait_exponential
 
 from config import get_settings
+from core.cache import get_cache
+from core.http import create_async_http_client, create_http_client
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Transient API failures worth retrying per batch request
+_RETRYABLE_ERRORS = (APIConnectionError, RateLimitError, InternalServerError)
+
+
+def normalize_embedding(embedding: list[float]) -> np.ndarray:
+    """Scale an embedding to unit length so cosine similarity is a dot product."""
+    vector = np.asarray(embedding, dtype=np.float32)
+    return vector / (np.linalg.norm(vector) + 1e-12)
+
 
 class EmbeddingService:
     """Service for generating text embeddings using OpenAI."""
 
     def __init__(self):
-        self.client = OpenAI(api_key=settings.openai_api_key)
+        self.client = OpenAI(
+            api_key=settings.openai_api_key,
+            http_client=create_http_client(settings.embedding_timeout),
+        )
+        self._async_client: Optional[AsyncOpenAI] = None
+        self._async_client_loop: Optional[asyncio.AbstractEventLoop] = None
         self.model = settings.embedding_model
         self.dimensions = settings.embedding_dimensions
 
+        # In-process LRU of recent embeddings, shared by sync and async callers
+        self._cache: OrderedDict[str, list[float]] = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._cache_size = settings.embedding_cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        # Micro-batching state for create_embedding_coalesced, bound to one event loop
+        self._batch_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: dict[str, list[asyncio.Future]] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._batch_tasks: set[asyncio.Task] = set()
+
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        """Async client for the running event loop (httpx pools are loop-bound)."""
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client_loop is not loop:
+            self._async_client = AsyncOpenAI(
+                api_key=settings.openai_api_key,
+                http_client=create_async_http_client(settings.embedding_timeout),
+            )
+            self._async_client_loop = loop
+        return self._async_client
+
+    @property
+    def _model_key(self) -> str:
+        """Model identity for cache keys; vectors differ per dimension count."""
+        return f"{self.model}:{self.dimensions}"
+
+    def _cache_key(self, text: str) -> str:
+        return hashlib.blake2b(f"{self._model_key}:{text}".encode(), digest_size=16).hexdigest()
+
+    def _cache_get(self, key: str) -> Optional[list[float]]:
+        with self._cache_lock:
+            embedding = self._cache.get(key)
+            if embedding is None:
+                self.cache_misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+        logger.debug(f"Embedding cache hit ({self.cache_hits} hits / {self.cache_misses} misses)")
+        return embedding
+
+    def _cache_put(self, key: str, embedding: list[float]) -> None:
+        with self._cache_lock:
+            self._cache[key] = embedding
+            self._cache.move_to_end(key)
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+    def _embed(self, text: str) -> list[float]:
+        """Call the embeddings API for one stripped, non-empty text."""
+        try:
+            response = self.client.embeddings.create(
+                model=self.model,
+                input=text,
+                dimensions=self.dimensions,
+            )
+            return response.data[0].embedding
+        except Exception as e:
+            logger.error(f"Failed to create embedding: {e}")
+            raise
+
     def create_embedding(self, text: str) -> list[float]:
         """
         Create an embedding vector for the given text.
@@ -33,26 +119,125 @@ class EmbeddingService:
         if not text or not text.strip():
             raise ValueError("Cannot create embedding for empty text")
 
-        try:
-            response = self.client.embeddings.create(
-                model=self.model,
-                input=text.strip(),
-                dimensions=self.dimensions,
+        text = text.strip()
+        key = self._cache_key(text)
+        embedding = self._cache_get(key)
+        if embedding is None:
+            embedding = self._embed(text)
+            self._cache_put(key, embedding)
+        return embedding
+
+    async def acreate_embedding(self, text: str) -> list[float]:
+        """
+        Create an embedding without blocking the event loop.
+
+        Checks the in-process LRU, then Redis, before calling the API;
+        new embeddings are written to both.
+
+        Args:
+            text: The text to embed
+
+        Returns:
+            List of floats representing the embedding vector
+        """
+        if not text or not text.strip():
+            raise ValueError("Cannot create embedding for empty text")
+
+        text = text.strip()
+        key = self._cache_key(text)
+        embedding = self._cache_get(key)
+        if embedding is not None:
+            return embedding
+
+        cache = get_cache()
+        if cache:
+            embedding = await cache.get_embedding(text, self._model_key)
+
+        if embedding is None:
+            embedding = await self.create_embedding_coalesced(text)
+            if cache:
+                await cache.set_embedding(text, self._model_key, embedding)
+
+        self._cache_put(key, embedding)
+        return embedding
+
+    async def create_embedding_coalesced(self, text: str) -> list[float]:
+        """
+        Create an embedding, sharing one API request with concurrent callers.
+
+        Requests arriving within embed_batch_window_ms of each other (up to
+        embed_batch_size distinct texts) are sent as a single batch call.
+
+        Args:
+            text: Stripped, non-empty text to embed
+
+        Returns:
+            List of floats representing the embedding vector
+        """
+        loop = asyncio.get_running_loop()
+        if self._batch_loop is not loop:
+            # First call, or a new loop (e.g. a script calling asyncio.run again)
+            self._batch_loop = loop
+            self._pending = {}
+            self._flush_handle = None
+
+        future = loop.create_future()
+        self._pending.setdefault(text, []).append(future)
+
+        if len(self._pending) >= settings.embed_batch_size:
+            self._flush_pending()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(
+                settings.embed_batch_window_ms / 1000, self._flush_pending
             )
-            return response.data[0].embedding
+
+        return await future
+
+    def _flush_pending(self) -> None:
+        """Dispatch the pending texts as one batch request."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, {}
+        if not batch:
+            return
+
+        task = self._batch_loop.create_task(self._dispatch_batch(batch))
+        self._batch_tasks.add(task)
+        task.add_done_callback(self._batch_tasks.discard)
+
+    async def _dispatch_batch(self, batch: dict[str, list[asyncio.Future]]) -> None:
+        """Embed a coalesced batch and resolve each waiting future."""
+        # Similar lengths per request keep provider-side padding low
+        texts = sorted(batch, key=len)
+        try:
+            embeddings = await self.create_embeddings_batch(texts)
         except Exception as e:
-            logger.error(f"Failed to create embedding: {e}")
-            raise
+            for futures in batch.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        for text, embedding in zip(texts, embeddings):
+            for future in batch[text]:
+                if not future.done():
+                    future.set_result(embedding)
 
-    def create_embeddings_batch(self, texts: list[str]) -> list[list[float]]:
+    async def create_embeddings_batch(self, texts: list[str]) -> list[list[float]]:
         """
-        Create embeddings for multiple texts in a single API call.
+        Create embeddings for multiple texts.
+
+        Texts are sorted by length and split into embed_chunk_size requests,
+        sent concurrently (at most embed_max_concurrent_batches in flight)
+        and retried on transient errors.
 
         Args:
             texts: List of texts to embed
 
         Returns:
-            List of embedding vectors
+            List of embedding vectors, in the order of the non-empty input texts
         """
         if not texts:
             return []
@@ -63,17 +248,38 @@ class EmbeddingService:
         if not valid_texts:
             return []
 
+        # Group similar lengths per request, remembering original positions
+        order = sorted(range(len(valid_texts)), key=lambda i: len(valid_texts[i]))
+        chunk_size = settings.embed_chunk_size
+        chunks = [order[i:i + chunk_size] for i in range(0, len(order), chunk_size)]
+        sem = asyncio.Semaphore(settings.embed_max_concurrent_batches)
+        embeddings: list[Optional[list[float]]] = [None] * len(valid_texts)
+
+        async def embed_chunk(indices: list[int]) -> None:
+            async with sem:
+                async for attempt in AsyncRetrying(
+                    retry=retry_if_exception_type(_RETRYABLE_ERRORS),
+                    stop=stop_after_attempt(3),
+                    wait=wait_exponential(multiplier=0.5, max=8),
+                    reraise=True,
+                ):
+                    with attempt:
+                        response = await self.async_client.embeddings.create(
+                            model=self.model,
+                            input=[valid_texts[i] for i in indices],
+                            dimensions=self.dimensions,
+                        )
+            for item in response.data:
+                embeddings[indices[item.index]] = item.embedding
+
         try:
-            response = self.client.embeddings.create(
-                model=self.model,
-                input=valid_texts,
-                dimensions=self.dimensions,
-            )
-            return [item.embedding for item in response.data]
+            await asyncio.gather(*(embed_chunk(chunk) for chunk in chunks))
         except Exception as e:
             logger.error(f"Failed to create batch embeddings: {e}")
             raise
 
+        return embeddings
+
 
 # Singleton instance
 _embedding_service: EmbeddingService | None = None
@@ -2,23 +2,56 @@
 RAG Memory service for agent context retrieval.
 """
 import logging
-from datetime import datetime
+from collections import defaultdict
+from operator import itemgetter
 from typing import Optional
 
-from sqlalchemy.orm import Session
+import numpy as np
+from sqlalchemy import CompoundSelect, Select, delete, func, select, text, union_all, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from models.database import AgentMemory
-from services.embedding import get_embedding_service
+from models.db import AsyncSessionLocal
+from services._topk_cosine import topk_cosine
+from services.embedding import get_embedding_service, normalize_embedding
 from config import get_settings
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+MEMORY_VECTOR_INDEX = "idx_agent_memories_embedding_hnsw"
+
+# Whether this process has already looked for MEMORY_VECTOR_INDEX
+_vector_index_checked = False
+
+
+async def _check_vector_index(db: AsyncSession) -> None:
+    """Warn once per process if the memory HNSW index is missing."""
+    global _vector_index_checked
+    if _vector_index_checked:
+        return
+    _vector_index_checked = True
+
+    try:
+        exists = (await db.execute(
+            text("SELECT 1 FROM pg_indexes WHERE tablename = 'agent_memories' AND indexname = :name"),
+            {"name": MEMORY_VECTOR_INDEX},
+        )).scalar()
+    except Exception as e:
+        logger.warning(f"Could not verify memory vector index: {e}")
+        return
+
+    if not exists:
+        logger.warning(
+            f"Index {MEMORY_VECTOR_INDEX} not found; memory searches will fall back "
+            "to sequential scans. Run the database migrations."
+        )
+
 
 class MemoryService:
     """Service for storing and retrieving agent memories using RAG."""
 
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
         self.embedding_service = get_embedding_service()
 
@@ -49,8 +82,11 @@ class MemoryService:
         Returns:
             The created AgentMemory record
         """
-        # Create embedding
-        embedding = await self.embedding_service.create_embedding(content)
+        # Create embedding, stored unit-normalized so in-process reranking
+        # can score candidates with a dot product
+        embedding = normalize_embedding(
+            await self.embedding_service.acreate_embedding(content)
+        ).tolist()
 
         memory = AgentMemory(
             organization_id=organization_id,
@@ -61,12 +97,17 @@ class MemoryService:
             importance=importance,
             source_entity_type=source_entity_type,
             source_entity_id=source_entity_id,
-            metadata=metadata or {},
+            extra_data=metadata or {},
         )
 
-        self.db.add(memory)
-        self.db.commit()
-        self.db.refresh(memory)
+        # Memories are reproducible context, so skip waiting on the WAL flush.
+        # Write in a separate session so the caller's pending changes are
+        # not committed asynchronously along with the memory.
+        async with AsyncSessionLocal() as session:
+            await session.execute(text("SET LOCAL synchronous_commit = off"))
+            session.add(memory)
+            await session.commit()
+            await session.refresh(memory)
 
         return memory
 
@@ -77,6 +118,7 @@ class MemoryService:
         memory_type: Optional[str] = None,
         top_k: int = 5,
         min_similarity: float = 0.7,
+        include_metadata: bool = False,
     ) -> list[dict]:
         """
         Search for relevant memories using semantic similarity.
@@ -87,58 +129,146 @@ class MemoryService:
             memory_type: Optional filter by memory type
             top_k: Maximum number of results
             min_similarity: Minimum similarity threshold
+            include_metadata: Also load each memory's metadata JSONB
 
         Returns:
             List of matching memories with similarity scores
         """
         # Create query embedding
-        query_embedding = await self.embedding_service.create_embedding(query)
+        query_embedding = await self.embedding_service.acreate_embedding(query)
+
+        return await self._search_with_embedding(
+            organization_id, query_embedding, memory_type, top_k, min_similarity, include_metadata
+        )
+
+    async def _search_with_embedding(
+        self,
+        organization_id: int,
+        query_embedding: list[float],
+        memory_type: Optional[str] = None,
+        top_k: int = 5,
+        min_similarity: float = 0.7,
+        include_metadata: bool = False,
+    ) -> list[dict]:
+        """Search memories with a precomputed query embedding."""
+        return await self._run_search(
+            self._search_stmt(
+                organization_id, query_embedding, memory_type, top_k, min_similarity, include_metadata
+            ),
+            query_embedding,
+            top_k,
+            include_metadata=include_metadata,
+        )
 
-        # Build query
-        base_query = self.db.query(
-            AgentMemory,
-            AgentMemory.embedding.cosine_distance(query_embedding).label("distance")
-        ).filter(
+    def _search_stmt(
+        self,
+        organization_id: int,
+        query_embedding: list[float],
+        memory_type: Optional[str],
+        top_k: int,
+        min_similarity: float,
+        include_metadata: bool = False,
+    ) -> Select:
+        """Build the nearest-memories query for one memory type (or all)."""
+        distance = AgentMemory.embedding.cosine_distance(query_embedding)
+
+        # When reranking, over-fetch HNSW candidates with their vectors;
+        # otherwise leave embeddings out of the transfer entirely
+        rerank_factor = settings.memory_rerank_factor
+        extra_columns = [AgentMemory.embedding] if rerank_factor > 0 else []
+        # The metadata JSONB can be large and most callers only need content
+        if include_metadata:
+            extra_columns.append(AgentMemory.extra_data)
+
+        # Threshold and limit in SQL; select plain columns so no ORM
+        # instances enter the identity map
+        stmt = select(
+            *extra_columns,
+            AgentMemory.id,
+            AgentMemory.memory_type,
+            AgentMemory.content,
+            AgentMemory.summary,
+            AgentMemory.importance,
+            AgentMemory.source_entity_type,
+            AgentMemory.source_entity_id,
+            AgentMemory.created_at,
+            distance.label("distance"),
+        ).where(
             AgentMemory.organization_id == organization_id,
             AgentMemory.embedding.isnot(None),
+            distance <= 1 - min_similarity,
         )
 
         if memory_type:
-            base_query = base_query.filter(AgentMemory.memory_type == memory_type)
-
-        # Order by similarity and limit
-        results = (
-            base_query
-            .order_by("distance")
-            .limit(top_k * 2)  # Get extra to filter by threshold
-            .all()
-        )
+            stmt = stmt.where(AgentMemory.memory_type == memory_type)
 
-        # Convert to response format and filter by threshold
-        memories = []
-        for memory, distance in results:
-            similarity = 1 - distance
-            if similarity >= min_similarity:
-                # Update accessed_at
-                memory.accessed_at = datetime.utcnow()
-
-                memories.append({
-                    "id": memory.id,
-                    "memory_type": memory.memory_type,
-                    "content": memory.content,
-                    "summary": memory.summary,
-                    "importance": float(memory.importance),
-                    "similarity": similarity,
-                    "source_entity_type": memory.source_entity_type,
-                    "source_entity_id": memory.source_entity_id,
-                    "metadata": memory.metadata,
-                    "created_at": memory.created_at.isoformat(),
-                })
-
-                if len(memories) >= top_k:
-                    break
-
-        self.db.commit()
+        return stmt.order_by(distance).limit(top_k * max(rerank_factor, 1))
+
+    def _rerank(
+        self,
+        rows: list,
+        query_embedding: list[float],
+        top_k: int,
+        per_type: bool,
+    ) -> list[tuple]:
+        """Exact FP32 cosine rerank of HNSW candidates, top_k per group."""
+        groups = defaultdict(list)
+        for row in rows:
+            groups[row.memory_type if per_type else None].append(row)
+
+        # Stored embeddings are unit-normalized, so normalize the query once
+        query = normalize_embedding(query_embedding)
+        ranked = []
+        for group in groups.values():
+            matrix = np.array([row.embedding.to_list() for row in group], dtype=np.float32)
+            indices, scores = topk_cosine(query, matrix, top_k, normalized=True)
+            ranked.extend((group[i], float(score)) for i, score in zip(indices, scores))
+        return ranked
+
+    async def _run_search(
+        self,
+        stmt: Select | CompoundSelect,
+        query_embedding: list[float],
+        top_k: int,
+        per_type: bool = False,
+        include_metadata: bool = False,
+    ) -> list[dict]:
+        """Execute a search statement and touch accessed_at on the hits."""
+        await _check_vector_index(self.db)
+
+        rows = (await self.db.execute(stmt)).all()
+        if settings.memory_rerank_factor > 0 and rows:
+            scored = self._rerank(rows, query_embedding, top_k, per_type)
+        else:
+            scored = [(row, 1 - row.distance) for row in rows]
+
+        # Convert to response format
+        memories = [
+            {
+                "id": row.id,
+                "memory_type": row.memory_type,
+                "content": row.content,
+                "summary": row.summary,
+                "importance": float(row.importance),
+                "similarity": similarity,
+                "source_entity_type": row.source_entity_type,
+                "source_entity_id": row.source_entity_id,
+                "created_at": row.created_at.isoformat(),
+            }
+            for row, similarity in scored
+        ]
+        if include_metadata:
+            for memory, (row, _) in zip(memories, scored):
+                memory["metadata"] = row.extra_data
+
+        # Touch accessed_at for all hits in one statement
+        if memories:
+            await self.db.execute(
+                update(AgentMemory)
+                .where(AgentMemory.id.in_([m["id"] for m in memories]))
+                .values(accessed_at=func.now())
+            )
+            await self.db.commit()
 
         return memories
 
@@ -161,34 +291,47 @@ class MemoryService:
         Returns:
             Formatted context string for injection into prompts
         """
-        all_memories = []
-
-        # Search across specified memory types
+        # Search across specified memory types, embedding the query once for
+        # all of them. An AsyncSession runs one statement at a time, so the
+        # per-type searches are combined into a single UNION ALL round-trip.
         types_to_search = memory_types or ["bom_parse", "supplier_match", "pricing", "po_generation"]
+        query_embedding = await self.embedding_service.acreate_embedding(query)
 
-        for memory_type in types_to_search:
-            memories = await self.search_memories(
-                organization_id=organization_id,
-                query=query,
-                memory_type=memory_type,
-                top_k=3,
+        type_stmts = [
+            self._search_stmt(
+                organization_id, query_embedding, memory_type, top_k=3, min_similarity=0.7,
+                include_metadata=False,
             )
-            all_memories.extend(memories)
+            for memory_type in types_to_search
+        ]
+        all_memories = await self._run_search(
+            union_all(*(select(stmt.subquery()) for stmt in type_stmts)),
+            query_embedding,
+            top_k=3,
+            per_type=True,
+            include_metadata=False,
+        )
 
         if not all_memories:
             return ""
 
-        # Sort by similarity and importance
-        all_memories.sort(
-            key=lambda m: m["similarity"] * 0.7 + m["importance"] * 0.3,
-            reverse=True
-        )
+        # Drop memories matched by more than one type search, then sort by a
+        # precomputed blend of similarity and importance
+        seen: set[int] = set()
+        ranked = []
+        for memory in all_memories:
+            if memory["id"] in seen:
+                continue
+            seen.add(memory["id"])
+            memory["_score"] = memory["similarity"] * 0.7 + memory["importance"] * 0.3
+            ranked.append(memory)
+        ranked.sort(key=itemgetter("_score"), reverse=True)
 
         # Format context
         context_parts = ["## Relevant Context from Memory\n"]
         current_length = len(context_parts[0])
 
-        for memory in all_memories:
+        for memory in ranked:
             entry = f"\n### {memory['memory_type'].replace('_', ' ').title()}\n{memory['content']}\n"
             if current_length + len(entry) > max_context_length:
                 break
@@ -197,7 +340,7 @@ class MemoryService:
 
         return "".join(context_parts)
 
-    def delete_memories_for_entity(
+    async def delete_memories_for_entity(
         self,
         source_entity_type: str,
         source_entity_id: int,
@@ -212,13 +355,11 @@ class MemoryService:
         Returns:
             Number of deleted memories
         """
-        deleted = (
-            self.db.query(AgentMemory)
-            .filter(
+        result = await self.db.execute(
+            delete(AgentMemory).where(
                 AgentMemory.source_entity_type == source_entity_type,
                 AgentMemory.source_entity_id == source_entity_id,
             )
-            .delete()
         )
-        self.db.commit()
-        return deleted
+        await self.db.commit()
+        return result.rowcount
@@ -0,0 +1,90 @@
+"""
+Similarity-keyed LRU cache for semantic search results.
+
+Near-duplicate queries (cosine similarity above a threshold) are served the
+result of an earlier query instead of another vector search round-trip.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+import numpy as np
+
+from config import get_settings
+
+settings = get_settings()
+
+
+class SemanticCache:
+    """
+    SIM-LRU cache of (unit-length query embedding, result) pairs.
+
+    Vectors live in one preallocated matrix, so a lookup is a single
+    gemv against every cached query. Entries only match lookups with the
+    same scope (e.g. organization and search parameters).
+    """
+
+    def __init__(self, capacity: int, dimensions: int, threshold: float, ttl: float):
+        self.capacity = capacity
+        self.threshold = threshold
+        self.ttl = ttl
+        self._vectors = np.zeros((capacity, dimensions), dtype=np.float32)
+        self._entries: list[Optional[tuple[Hashable, float, dict]]] = [None] * capacity
+        self._lru: OrderedDict[int, None] = OrderedDict()  # slot -> None, oldest first
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, scope: Hashable, vector: np.ndarray) -> Optional[dict]:
+        """
+        Return the result cached for the most similar query in scope.
+
+        Args:
+            scope: Key the cached query must share with this one
+            vector: Unit-length float32 query embedding
+
+        Returns:
+            Cached result, or None if no live entry clears the threshold
+        """
+        with self._lock:
+            if self._lru:
+                # Empty slots are zero vectors and never clear the threshold
+                scores = self._vectors @ vector
+                close = np.flatnonzero(scores >= self.threshold)
+                now = time.monotonic()
+                for slot in close[np.argsort(-scores[close])]:
+                    entry_scope, expires_at, result = self._entries[slot]
+                    if entry_scope == scope and expires_at > now:
+                        self._lru.move_to_end(int(slot))
+                        self.hits += 1
+                        return result
+            self.misses += 1
+            return None
+
+    def put(self, scope: Hashable, vector: np.ndarray, result: dict) -> None:
+        """Cache a result, evicting the least recently used entry when full."""
+        with self._lock:
+            if len(self._lru) < self.capacity:
+                slot = len(self._lru)
+            else:
+                slot, _ = self._lru.popitem(last=False)
+            self._vectors[slot] = vector
+            self._entries[slot] = (scope, time.monotonic() + self.ttl, result)
+            self._lru[slot] = None
+
+
+_semantic_search_cache: SemanticCache | None = None
+
+
+def get_semantic_search_cache() -> SemanticCache:
+    """Get or create the semantic part search cache singleton."""
+    global _semantic_search_cache
+    if _semantic_search_cache is None:
+        _semantic_search_cache = SemanticCache(
+            capacity=settings.semantic_search_cache_size,
+            dimensions=settings.embedding_dimensions,
+            threshold=settings.semantic_search_cache_threshold,
+            ttl=settings.semantic_search_cache_ttl,
+        )
+    return _semantic_search_cache
@@ -5,12 +5,14 @@ Implements Server-Sent Events (SSE) for real-time LLM output streaming,
 following production best practices for LLM applications.
 """
 import asyncio
-import json
 import logging
+from collections import deque
 from typing import AsyncGenerator, Any, Optional
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from enum import Enum
 
+import orjson
+import xxhash
 from sse_starlette.sse import EventSourceResponse
 from anthropic import AsyncAnthropic
 from langchain_anthropic import ChatAnthropic
@@ -18,10 +20,22 @@ from langchain_core.messages import HumanMessage, AIMessageChunk
 
 from config import get_settings
 from core.cache import get_cache
+from core.http import create_async_http_client
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Coalesce streamed text into one TOKEN event per this many characters or
+# seconds, whichever comes first, instead of one SSE frame per model chunk
+TOKEN_FLUSH_CHARS = 64
+TOKEN_FLUSH_INTERVAL = 0.03
+
+# Events buffered between the producer and a slow SSE client; once full,
+# further TOKEN events are merged into the newest buffered TOKEN event
+SSE_BUFFER_SIZE = 256
+
+_END_OF_STREAM = object()
+
 
 class StreamEventType(str, Enum):
     """Types of streaming events."""
@@ -34,7 +48,44 @@ class StreamEventType(str, Enum):
     ERROR = "error"
 
 
-@dataclass
+# Event names resolved once, not via Enum .value on every event
+_EVENT_NAMES = {event_type: event_type.value for event_type in StreamEventType}
+
+
+# Fixed parts of a metadata-free TOKEN payload, so the hot path serializes
+# only the token text instead of building and encoding a wrapper dict
+_TOKEN_JSON_PREFIX = '{"type":"token","data":'
+_TOKEN_JSON_SUFFIX = ',"metadata":{}}'
+
+# Step result summaries, checked in order; the first key present wins
+_FORMATTERS = (
+    ("items_processed", lambda r: f"Processed {r['items_processed']} items"),
+    ("matches_found", lambda r: f"Found {r['matches_found']} matches"),
+    ("po_number", lambda r: f"Created PO #{r['po_number']}"),
+)
+
+# Formatter chosen per result shape (frozenset of keys); None means no match
+_FORMATTER_BY_SHAPE: dict = {}
+_FORMATTER_CACHE_LIMIT = 256
+
+
+def _cache_key(
+    prompt: str,
+    model: str,
+    system: Optional[str],
+    max_tokens: int,
+    temperature: float,
+) -> str:
+    """Redis key for a completion, versioned by settings.cache_schema_version."""
+    prompt_hash = xxhash.xxh3_128_hexdigest(prompt.strip().encode())
+    system_hash = xxhash.xxh3_64_hexdigest((system or "").strip().encode())
+    return (
+        f"llm:v{settings.cache_schema_version}:{model}:{max_tokens}:{temperature}:"
+        f"{system_hash}:{prompt_hash}"
+    )
+
+
+@dataclass(slots=True)
 class StreamEvent:
     """A streaming event to send to the client."""
     event_type: StreamEventType
@@ -43,13 +94,19 @@ class StreamEvent:
 
     def to_sse(self) -> dict:
         """Convert to SSE format."""
+        if self.event_type is StreamEventType.TOKEN and not self.metadata:
+            return {
+                "event": "token",
+                "data": _TOKEN_JSON_PREFIX + orjson.dumps(self.data).decode() + _TOKEN_JSON_SUFFIX,
+            }
+        name = _EVENT_NAMES[self.event_type]
         return {
-            "event": self.event_type.value,
-            "data": json.dumps({
-                "type": self.event_type.value,
+            "event": name,
+            "data": orjson.dumps({
+                "type": name,
                 "data": self.data,
                 "metadata": self.metadata or {},
-            }),
+            }).decode(),
         }
 
 
@@ -66,7 +123,10 @@ class LLMStreamingService:
     """
 
     def __init__(self):
-        self.client = AsyncAnthropic(api_key=settings.anthropic_api_key)
+        self.client = AsyncAnthropic(
+            api_key=settings.anthropic_api_key,
+            http_client=create_async_http_client(settings.llm_timeout),
+        )
         self.model = settings.llm_model
         self.cache = get_cache()
 
@@ -95,10 +155,9 @@ class LLMStreamingService:
         """
         # Check cache first
         if use_cache and self.cache:
-            cached = await self.cache.get_llm_response(
-                prompt, self.model,
-                system=system, max_tokens=max_tokens, temperature=temperature
-            )
+            cache_key = cache_key or _cache_key(prompt, self.model, system, max_tokens, temperature)
+            cached_raw = await self.cache.get(cache_key)
+            cached = orjson.loads(cached_raw) if cached_raw else None
             if cached:
                 yield StreamEvent(
                     event_type=StreamEventType.START,
@@ -120,8 +179,12 @@ class LLMStreamingService:
             data={"model": self.model, "cached": False},
         )
 
-        full_response = ""
+        chunks: list[str] = []
         usage = {}
+        loop = asyncio.get_running_loop()
+        pending: list[str] = []
+        pending_len = 0
+        last_flush = loop.time()
 
         try:
             async with self.client.messages.stream(
@@ -132,10 +195,25 @@ class LLMStreamingService:
                 messages=[{"role": "user", "content": prompt}],
             ) as stream:
                 async for text in stream.text_stream:
-                    full_response += text
+                    chunks.append(text)
+                    pending.append(text)
+                    pending_len += len(text)
+
+                    now = loop.time()
+                    if pending_len >= TOKEN_FLUSH_CHARS or now - last_flush >= TOKEN_FLUSH_INTERVAL:
+                        yield StreamEvent(
+                            event_type=StreamEventType.TOKEN,
+                            data="".join(pending),
+                        )
+                        pending.clear()
+                        pending_len = 0
+                        last_flush = now
+
+                # Flush any remaining text before completion
+                if pending:
                     yield StreamEvent(
                         event_type=StreamEventType.TOKEN,
-                        data=text,
+                        data="".join(pending),
                     )
 
                 # Get final message for usage stats
@@ -147,10 +225,10 @@ class LLMStreamingService:
 
             # Cache the response
             if use_cache and self.cache:
-                await self.cache.set_llm_response(
-                    prompt, self.model,
-                    {"content": full_response, "usage": usage},
-                    system=system, max_tokens=max_tokens, temperature=temperature
+                full_response = "".join(chunks)
+                await self.cache.set(
+                    cache_key,
+                    orjson.dumps({"content": full_response, "usage": usage}).decode(),
                 )
 
             yield StreamEvent(
@@ -252,13 +330,17 @@ class LLMStreamingService:
     def _summarize_result(self, result: Any, max_length: int = 200) -> str:
         """Create a brief summary of a result for streaming updates."""
         if isinstance(result, dict):
-            if "items_processed" in result:
-                return f"Processed {result['items_processed']} items"
-            if "matches_found" in result:
-                return f"Found {result['matches_found']} matches"
-            if "po_number" in result:
-                return f"Created PO #{result['po_number']}"
-            return str(result)[:max_length]
+            shape = frozenset(result)
+            try:
+                formatter = _FORMATTER_BY_SHAPE[shape]
+            except KeyError:
+                formatter = next(
+                    (fn for key, fn in _FORMATTERS if key in result), None
+                )
+                if len(_FORMATTER_BY_SHAPE) < _FORMATTER_CACHE_LIMIT:
+                    _FORMATTER_BY_SHAPE[shape] = formatter
+            if formatter is not None:
+                return formatter(result)
         return str(result)[:max_length]
 
 
@@ -274,16 +356,57 @@ async def create_sse_response(
     Returns:
         EventSourceResponse for FastAPI
     """
-    async def generate():
+    # Run the producer as its own task so a slow client never stalls the
+    # upstream LLM stream (and the cache write after it)
+    buffer: deque = deque()
+    not_empty = asyncio.Event()
+    not_full = asyncio.Event()
+    not_full.set()
+
+    async def pump():
         try:
             async for event in event_generator:
+                while len(buffer) >= SSE_BUFFER_SIZE:
+                    tail = buffer[-1]
+                    if (
+                        event.event_type is StreamEventType.TOKEN
+                        and tail.event_type is StreamEventType.TOKEN
+                        and not event.metadata
+                        and not tail.metadata
+                    ):
+                        tail.data += event.data
+                        break
+                    not_full.clear()
+                    await not_full.wait()
+                else:
+                    buffer.append(event)
+                    not_empty.set()
+        finally:
+            buffer.append(_END_OF_STREAM)
+            not_empty.set()
+
+    async def generate():
+        producer = asyncio.create_task(pump())
+        try:
+            while True:
+                while not buffer:
+                    not_empty.clear()
+                    await not_empty.wait()
+                event = buffer.popleft()
+                not_full.set()
+                if event is _END_OF_STREAM:
+                    break
                 yield event.to_sse()
+            # Surface any exception raised by the event generator
+            await producer
         except asyncio.CancelledError:
             logger.info("SSE connection cancelled by client")
             yield StreamEvent(
                 event_type=StreamEventType.ERROR,
                 data={"error": "Connection cancelled"},
             ).to_sse()
+        finally:
+            producer.cancel()
 
     return EventSourceResponse(generate())
 
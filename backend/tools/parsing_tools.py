@@ -2,176 +2,310 @@
 Tools for parsing BOM files in various formats.
 """
 import logging
+import os
 import re
+from functools import lru_cache
+from itertools import chain, islice
 from typing import Optional
-from decimal import Decimal
 
+import numpy as np
+import openpyxl
 import pandas as pd
+import pyarrow as pa
 from langchain_core.tools import tool
 
 logger = logging.getLogger(__name__)
 
 
+def _alternation(patterns: list[str], flags: int = 0) -> re.Pattern:
+    """Compile literal substrings into a single alternation regex."""
+    return re.compile("|".join(map(re.escape, patterns)), flags)
+
+
+# Column name patterns per BOM field as (priority, fallback) tiers; a column
+# matching a priority pattern always wins over one matching a fallback
+_COLUMN_RULES = (
+    # Part number - prioritize explicit part number columns
+    ("part_number", (
+        _alternation(["part number", "part_number", "partnumber", "part no", "part #", "pn", "p/n", "mpn", "mfr part"]),
+        _alternation(["part", "item", "sku", "item_number", "itemnumber", "libref", "lib ref"]),
+    )),
+    # Description - prioritize "description" over fallbacks like "comment"
+    ("description", (
+        _alternation(["description", "desc"]),
+        _alternation(["comment", "name", "item_name", "part_name", "component", "value"]),
+    )),
+    ("quantity", (_alternation(["qty", "quantity", "qnty", "count", "amount"]),)),
+    ("uom", (_alternation(["uom", "unit", "u/m", "unit_of_measure", "measure"]),)),
+    # Designator/Reference - useful for electronics BOMs
+    ("designator", (_alternation(["designator", "ref des", "reference", "ref"]),)),
+)
+
+# Every field/tier pattern as an optional lookahead in one regex, so a single
+# match per column name reports all fields it could map to. Groups are
+# named "<field>__<tier>".
+_COLUMN_RE = re.compile(
+    "".join(
+        f"(?:(?=.*?(?P<{field}__{tier}>{pattern.pattern})))?"
+        for field, tiers in _COLUMN_RULES
+        for tier, pattern in enumerate(tiers)
+    ),
+    re.DOTALL,
+)
+
+# Patterns that indicate a header row; case-insensitive so raw cell text can
+# be scanned without lowercasing every cell
+_HEADER_RE = _alternation([
+    "part number", "part_number", "partnumber", "part no", "part #", "pn", "p/n",
+    "description", "desc", "component",
+    "quantity", "qty", "qnty",
+    "designator", "ref des", "reference",
+    "manufacturer", "mfr", "mfg",
+    "footprint", "package",
+], re.IGNORECASE)
+
+_NUMBER_RE = re.compile(r"(-?[\d.]+)")
+_PART_NUMBER_PREFIX_RE = re.compile(r"^[#\-\s]+")
+
+
 def detect_column_mapping(df: pd.DataFrame) -> dict[str, str]:
     """
     Detect which columns contain BOM data based on column names.
 
     Returns mapping of: {bom_field: column_name}
     """
-    column_map = {}
-    columns_lower = {col: str(col).lower().strip() for col in df.columns}
-
-    # Part number patterns - prioritize explicit part number columns
-    pn_patterns_priority = ["part number", "part_number", "partnumber", "part no", "part #", "pn", "p/n", "mpn", "mfr part"]
-    pn_patterns_fallback = ["part", "item", "sku", "item_number", "itemnumber", "libref", "lib ref"]
-
-    # First try priority patterns (exact part number columns)
-    for col, col_lower in columns_lower.items():
-        # Skip columns that have "supplier" in them - those are supplier part numbers, not the main part number
-        if "supplier" in col_lower:
-            continue
-        if any(pattern in col_lower for pattern in pn_patterns_priority):
-            column_map["part_number"] = col
-            break
-
-    # If not found, try fallback patterns
-    if "part_number" not in column_map:
-        for col, col_lower in columns_lower.items():
-            if "supplier" in col_lower:
+    # Uploads from the same BOM template repeat the same header, so the
+    # mapping is memoized on the column names
+    return dict(_column_mapping_for(tuple(df.columns)))
+
+
+@lru_cache(maxsize=256)
+def _column_mapping_for(columns: tuple) -> dict[str, str]:
+    """Column mapping for a header; callers must copy the cached dict."""
+    # One regex match per column, remembering the first column per field and tier
+    first_match: dict[str, str] = {}
+    for col in columns:
+        col_lower = str(col).lower().strip()
+        # Columns with "supplier" in them are supplier part numbers, not the main part number
+        is_supplier = "supplier" in col_lower
+        for group, hit in _COLUMN_RE.match(col_lower).groupdict().items():
+            if hit is None or group in first_match:
                 continue
-            if any(pattern in col_lower for pattern in pn_patterns_fallback):
-                column_map["part_number"] = col
-                break
+            if is_supplier and group.startswith("part_number__"):
+                continue
+            first_match[group] = col
 
-    # Description patterns - prioritize "description" over fallbacks like "comment"
-    desc_patterns_priority = ["description", "desc"]
-    desc_patterns_fallback = ["comment", "name", "item_name", "part_name", "component", "value"]
-
-    # First try priority patterns
-    for col, col_lower in columns_lower.items():
-        if any(pattern in col_lower for pattern in desc_patterns_priority) and "description" not in column_map:
-            column_map["description"] = col
-            break
-
-    # If not found, try fallback patterns
-    if "description" not in column_map:
-        for col, col_lower in columns_lower.items():
-            if any(pattern in col_lower for pattern in desc_patterns_fallback):
-                column_map["description"] = col
+    column_map = {}
+    for field, tiers in _COLUMN_RULES:
+        for tier in range(len(tiers)):
+            if f"{field}__{tier}" in first_match:
+                column_map[field] = first_match[f"{field}__{tier}"]
                 break
 
-    # Quantity patterns
-    qty_patterns = ["qty", "quantity", "qnty", "count", "amount"]
-    for col, col_lower in columns_lower.items():
-        if any(pattern in col_lower for pattern in qty_patterns) and "quantity" not in column_map:
-            column_map["quantity"] = col
-            break
+    return column_map
 
-    # Unit of measure patterns
-    uom_patterns = ["uom", "unit", "u/m", "unit_of_measure", "measure"]
-    for col, col_lower in columns_lower.items():
-        if any(pattern in col_lower for pattern in uom_patterns) and "uom" not in column_map:
-            column_map["uom"] = col
-            break
 
-    # Designator/Reference - useful for electronics BOMs
-    ref_patterns = ["designator", "ref des", "reference", "ref"]
-    for col, col_lower in columns_lower.items():
-        if any(pattern in col_lower for pattern in ref_patterns) and "designator" not in column_map:
-            column_map["designator"] = col
-            break
+def _text_column(df: pd.DataFrame, column_map: dict[str, str], field: str) -> pd.Series:
+    """Stripped string values of a mapped column, all-NA if the field is unmapped."""
+    if field not in column_map:
+        return pd.Series(pd.NA, index=df.index, dtype="string")
+    return df[column_map[field]].astype("string").str.strip()
 
-    return column_map
 
+def _uom_column(df: pd.DataFrame, column_map: dict[str, str]) -> pd.Series:
+    """
+    Normalized (stripped, upper-case) units of measure, "EA" where missing.
 
-def clean_quantity(value) -> Optional[Decimal]:
-    """Clean and convert quantity value to Decimal."""
-    if pd.isna(value):
-        return None
+    UOMs come from a handful of distinct values, so normalization runs on
+    the categories of a categorical and is expanded back through its codes.
+    """
+    if "uom" not in column_map:
+        return pd.Series("EA", index=df.index, dtype=object)
+
+    raw = df[column_map["uom"]].astype("category")
+    normalized = raw.cat.categories.astype(str).str.strip().str.upper()
+    # Missing values have code -1, which picks the trailing "EA"
+    lookup = np.append(normalized.to_numpy(dtype=object), "EA")
+    return pd.Series(lookup[raw.cat.codes.to_numpy()], index=df.index)
+
+
+def extract_bom_items(
+    df: pd.DataFrame,
+    column_map: dict[str, str],
+    first_line: int = 1,
+    as_arrow: bool = False,
+) -> tuple[list[dict] | pa.Table, list[str]]:
+    """
+    Build BOM line items from a parsed sheet using column-wise operations.
 
-    if isinstance(value, (int, float)):
-        return Decimal(str(value))
+    Rows with neither a part number nor a description are dropped. Rows
+    with a missing or non-positive quantity default to 1 and add a warning.
+    Line numbers start at first_line, so chunks of one file can be numbered
+    continuously.
 
-    # Try to extract number from string
-    value_str = str(value).strip()
-    match = re.search(r"[\d.]+", value_str)
-    if match:
-        return Decimal(match.group())
+    Returns:
+        Tuple of (items, warnings); items is a list of dicts, or a pyarrow
+        Table with the same columns when as_arrow is set
+    """
+    # Drop blank rows (e.g. trailing formatted-but-empty sheet rows) up front
+    # with one nullity pass; the index is kept for warning row numbers
+    mapped = list(dict.fromkeys(column_map.values()))
+    df = df.loc[df[mapped].notna().any(axis=1)]
+
+    part_number = (
+        _text_column(df, column_map, "part_number")
+        .str.replace(_PART_NUMBER_PREFIX_RE, "", regex=True)
+        .replace("", pd.NA)
+    )
+    description = _text_column(df, column_map, "description")
+    unit_of_measure = _uom_column(df, column_map)
+
+    if "quantity" in column_map:
+        qty_col = df[column_map["quantity"]]
+        if pd.api.types.is_numeric_dtype(qty_col):
+            quantity = pd.to_numeric(qty_col, errors="coerce").astype("float64")
+        else:
+            # Plain numbers (including negatives) parse directly; only the
+            # rest go through the first-number extraction for "10 pcs"
+            text = qty_col.astype("string").str.strip()
+            quantity = pd.to_numeric(text, errors="coerce").astype("float64")
+            unparsed = quantity.isna() & text.notna()
+            if unparsed.any():
+                quantity[unparsed] = pd.to_numeric(
+                    text[unparsed].str.extract(_NUMBER_RE, expand=False), errors="coerce"
+                ).astype("float64")
+    else:
+        quantity = pd.Series(float("nan"), index=df.index)
 
-    return None
+    keep = part_number.notna() | description.fillna("").ne("")
+    bad = keep & (quantity.isna() | (quantity <= 0))
 
+    labels = part_number.fillna(description)
+    warnings = [
+        f"Row {idx + 2}: Missing or invalid quantity for {label}"
+        for idx, label in labels[bad].items()
+    ]
 
-def clean_part_number(value) -> Optional[str]:
-    """Clean part number value."""
-    if pd.isna(value):
-        return None
+    out = pd.DataFrame({
+        "part_number_raw": part_number,
+        "description_raw": description,
+        "quantity": quantity.mask(bad, 1.0),
+        "unit_of_measure": unit_of_measure,
+    }).loc[keep]
+    out.insert(0, "line_number", np.arange(first_line, first_line + len(out), dtype=np.int32))
+    if as_arrow:
+        return pa.Table.from_pandas(out, preserve_index=False), warnings
 
-    pn = str(value).strip()
-    # Remove common prefixes/suffixes
-    pn = re.sub(r"^[#\-\s]+", "", pn)
-    return pn if pn else None
+    # JSON-friendly nulls for the tool output
+    for col in ("part_number_raw", "description_raw"):
+        out[col] = out[col].astype(object).where(out[col].notna(), None)
 
+    return out.to_dict(orient="records"), warnings
 
-def find_header_row(file_path: str, sheet_name: Optional[str] = None) -> int:
-    """
-    Find the row containing column headers in a BOM file.
 
-    Scans for rows containing recognizable BOM column headers like
-    'Part Number', 'Description', 'Quantity', etc.
+# Rows scanned from the top of a sheet when looking for the header row
+HEADER_SCAN_ROWS = 30
+
+# CSV files larger than this are parsed in chunks of CSV_CHUNK_ROWS rows
+CSV_CHUNK_THRESHOLD_BYTES = 50 * 1024 * 1024
+CSV_CHUNK_ROWS = 50_000
 
-    Returns the 0-based row index of the header row.
-    """
-    # Read without headers to scan all rows
-    if sheet_name:
-        df_raw = pd.read_excel(file_path, sheet_name=sheet_name, header=None)
-    else:
-        df_raw = pd.read_excel(file_path, sheet_name=0, header=None)
-
-    # Patterns that indicate a header row
-    header_patterns = [
-        "part number", "part_number", "partnumber", "part no", "part #", "pn", "p/n",
-        "description", "desc", "component",
-        "quantity", "qty", "qnty",
-        "designator", "ref des", "reference",
-        "manufacturer", "mfr", "mfg",
-        "footprint", "package",
-    ]
 
-    # Scan first 30 rows to find header row
-    for row_idx in range(min(30, len(df_raw))):
-        row_values = df_raw.iloc[row_idx].astype(str).str.lower().str.strip()
-        matches = sum(1 for val in row_values if any(pattern in val for pattern in header_patterns))
-        # If we find 2+ matching column headers, this is likely the header row
-        if matches >= 2:
-            return row_idx
+def _header_row_index(rows: list[tuple]) -> int:
+    """Index of the first row with 2+ recognizable BOM column headers, else 0."""
+    for row_idx, row in enumerate(rows):
+        matches = 0
+        for val in row:
+            # Every header pattern contains letters, so only text cells can match
+            if isinstance(val, str) and _HEADER_RE.search(val):
+                matches += 1
+                # If we find 2+ matching column headers, this is likely the header row
+                if matches >= 2:
+                    return row_idx
 
     # Default to first row if no header row found
     return 0
 
 
-@tool
-def parse_excel_bom(file_path: str, sheet_name: Optional[str] = None) -> dict:
+def _open_sheet(file_path: str, sheet_name: Optional[str] = None):
+    """Open a workbook lazily and return (workbook, worksheet)."""
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    worksheet = workbook[sheet_name] if sheet_name else workbook.worksheets[0]
+    # Stored dimensions are often wrong; let iteration find the real extent
+    worksheet.reset_dimensions()
+    return workbook, worksheet
+
+
+def _column_names(header: tuple) -> list[str]:
+    """Header cell values as unique column names, named like pandas would."""
+    names = []
+    seen: dict[str, int] = {}
+    for i, value in enumerate(header):
+        name = f"Unnamed: {i}" if value is None else str(value)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def read_excel_bom_sheet(file_path: str, sheet_name: Optional[str] = None) -> tuple[pd.DataFrame, int]:
+    """
+    Read a BOM sheet in one streaming pass over the workbook.
+
+    The first HEADER_SCAN_ROWS rows are buffered to locate the header row;
+    the remaining rows are streamed straight into the DataFrame.
+
+    Returns:
+        Tuple of (DataFrame indexed so that index + 2 is the sheet row number,
+        0-based header row index)
+    """
+    workbook, worksheet = _open_sheet(file_path, sheet_name)
+    try:
+        rows = worksheet.iter_rows(values_only=True)
+        head = list(islice(rows, HEADER_SCAN_ROWS))
+        if not head:
+            return pd.DataFrame(), 0
+
+        header_row = _header_row_index(head)
+        columns = _column_names(head[header_row])
+        width = len(columns)
+        data = [
+            row[:width] + (None,) * (width - len(row))
+            for row in chain(head[header_row + 1:], rows)
+        ]
+    finally:
+        workbook.close()
+
+    df = pd.DataFrame(data, columns=columns)
+    df.index = pd.RangeIndex(header_row, header_row + len(df))
+    return df, header_row
+
+
+def parse_excel_bom_impl(
+    file_path: str,
+    sheet_name: Optional[str] = None,
+    as_arrow: bool = False,
+) -> dict:
     """
     Parse a BOM from an Excel file.
 
     Args:
         file_path: Path to the Excel file
         sheet_name: Optional specific sheet to parse (defaults to first sheet)
+        as_arrow: Return items as a pyarrow Table instead of a list of dicts
 
     Returns:
         Dictionary with parsed items and metadata
     """
     try:
-        # Find the actual header row (skip metadata sections)
-        header_row = find_header_row(file_path, sheet_name)
+        # Read the sheet once, finding the actual header row (skipping
+        # metadata sections) on the way
+        df, header_row = read_excel_bom_sheet(file_path, sheet_name)
         logger.info(f"Detected header row at index {header_row}")
 
-        # Read Excel file starting from the detected header row
-        if sheet_name:
-            df = pd.read_excel(file_path, sheet_name=sheet_name, header=header_row)
-        else:
-            df = pd.read_excel(file_path, sheet_name=0, header=header_row)
-
         # Detect column mapping
         column_map = detect_column_mapping(df)
         logger.info(f"Detected columns: {list(df.columns)}")
@@ -184,51 +318,7 @@ def parse_excel_bom(file_path: str, sheet_name: Optional[str] = None) -> dict:
                 "items": [],
             }
 
-        # Parse rows
-        items = []
-        warnings = []
-
-        for idx, row in df.iterrows():
-            # Skip empty rows
-            if row.isna().all():
-                continue
-
-            # Extract values based on detected columns
-            part_number = None
-            description = None
-            quantity = None
-            uom = "EA"
-
-            if "part_number" in column_map:
-                part_number = clean_part_number(row.get(column_map["part_number"]))
-
-            if "description" in column_map:
-                desc_val = row.get(column_map["description"])
-                description = str(desc_val).strip() if not pd.isna(desc_val) else None
-
-            if "quantity" in column_map:
-                quantity = clean_quantity(row.get(column_map["quantity"]))
-
-            if "uom" in column_map:
-                uom_val = row.get(column_map["uom"])
-                if not pd.isna(uom_val):
-                    uom = str(uom_val).strip().upper()
-
-            # Skip rows without part number or quantity
-            if not part_number and not description:
-                continue
-
-            if quantity is None or quantity <= 0:
-                warnings.append(f"Row {idx + 2}: Missing or invalid quantity for {part_number or description}")
-                quantity = Decimal("1")  # Default to 1
-
-            items.append({
-                "line_number": len(items) + 1,
-                "part_number_raw": part_number,
-                "description_raw": description,
-                "quantity": float(quantity),
-                "unit_of_measure": uom,
-            })
+        items, warnings = extract_bom_items(df, column_map, as_arrow=as_arrow)
 
         return {
             "success": True,
@@ -247,24 +337,26 @@ def parse_excel_bom(file_path: str, sheet_name: Optional[str] = None) -> dict:
         }
 
 
-@tool
-def parse_csv_bom(file_path: str, delimiter: str = ",") -> dict:
+def parse_csv_bom_impl(file_path: str, delimiter: str = ",", as_arrow: bool = False) -> dict:
     """
     Parse a BOM from a CSV file.
 
     Args:
         file_path: Path to the CSV file
         delimiter: Column delimiter (default: comma)
+        as_arrow: Return items as a pyarrow Table instead of a list of dicts
 
     Returns:
         Dictionary with parsed items and metadata
     """
     try:
         # Use error handling for malformed CSVs
-        df = pd.read_csv(file_path, delimiter=delimiter, on_bad_lines='warn', quoting=1)
+        read_options = {"delimiter": delimiter, "on_bad_lines": "warn", "quoting": 1}
 
-        # Reuse Excel parsing logic
-        column_map = detect_column_mapping(df)
+        # Detect columns from the header alone, then load only the mapped
+        # columns as strings so pandas skips per-column type inference
+        header = pd.read_csv(file_path, nrows=0, **read_options)
+        column_map = detect_column_mapping(header)
 
         if not column_map:
             return {
@@ -273,47 +365,27 @@ def parse_csv_bom(file_path: str, delimiter: str = ",") -> dict:
                 "items": [],
             }
 
-        items = []
-        warnings = []
-
-        for idx, row in df.iterrows():
-            if row.isna().all():
-                continue
-
-            part_number = None
-            description = None
-            quantity = None
-            uom = "EA"
-
-            if "part_number" in column_map:
-                part_number = clean_part_number(row.get(column_map["part_number"]))
-
-            if "description" in column_map:
-                desc_val = row.get(column_map["description"])
-                description = str(desc_val).strip() if not pd.isna(desc_val) else None
-
-            if "quantity" in column_map:
-                quantity = clean_quantity(row.get(column_map["quantity"]))
+        usecols = list(dict.fromkeys(column_map.values()))
+        read_options.update(usecols=usecols, dtype={col: "string" for col in usecols})
 
-            if "uom" in column_map:
-                uom_val = row.get(column_map["uom"])
-                if not pd.isna(uom_val):
-                    uom = str(uom_val).strip().upper()
-
-            if not part_number and not description:
-                continue
-
-            if quantity is None or quantity <= 0:
-                warnings.append(f"Row {idx + 2}: Missing or invalid quantity")
-                quantity = Decimal("1")
-
-            items.append({
-                "line_number": len(items) + 1,
-                "part_number_raw": part_number,
-                "description_raw": description,
-                "quantity": float(quantity),
-                "unit_of_measure": uom,
-            })
+        if os.path.getsize(file_path) <= CSV_CHUNK_THRESHOLD_BYTES:
+            items, warnings = extract_bom_items(
+                pd.read_csv(file_path, **read_options), column_map, as_arrow=as_arrow
+            )
+        else:
+            parts, warnings, line_count = [], [], 0
+            with pd.read_csv(file_path, chunksize=CSV_CHUNK_ROWS, **read_options) as reader:
+                for chunk in reader:
+                    chunk_items, chunk_warnings = extract_bom_items(
+                        chunk, column_map, first_line=line_count + 1, as_arrow=as_arrow
+                    )
+                    parts.append(chunk_items)
+                    warnings.extend(chunk_warnings)
+                    line_count += len(chunk_items)
+            if as_arrow:
+                items = pa.concat_tables(parts) if parts else pa.table({})
+            else:
+                items = list(chain.from_iterable(parts))
 
         return {
             "success": True,
@@ -332,6 +404,39 @@ def parse_csv_bom(file_path: str, delimiter: str = ",") -> dict:
         }
 
 
+# LangChain tool wrappers; tool output must be JSON, so items are always a
+# list of dicts here. In-process callers can use the _impl functions with
+# as_arrow=True to keep items columnar.
+@tool
+def parse_excel_bom(file_path: str, sheet_name: Optional[str] = None) -> dict:
+    """
+    Parse a BOM from an Excel file.
+
+    Args:
+        file_path: Path to the Excel file
+        sheet_name: Optional specific sheet to parse (defaults to first sheet)
+
+    Returns:
+        Dictionary with parsed items and metadata
+    """
+    return parse_excel_bom_impl(file_path, sheet_name)
+
+
+@tool
+def parse_csv_bom(file_path: str, delimiter: str = ",") -> dict:
+    """
+    Parse a BOM from a CSV file.
+
+    Args:
+        file_path: Path to the CSV file
+        delimiter: Column delimiter (default: comma)
+
+    Returns:
+        Dictionary with parsed items and metadata
+    """
+    return parse_csv_bom_impl(file_path, delimiter)
+
+
 @tool
 def validate_bom_structure(items: list[dict]) -> dict:
     """
@@ -2,57 +2,57 @@
 Tools for purchase order generation and validation.
 """
 import logging
+from collections import defaultdict
 from datetime import datetime
 from decimal import Decimal
 from typing import Optional
 
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, func, insert, or_, select, update
+from sqlalchemy.orm import Session, joinedload
 from langchain_core.tools import tool
 
-from models.database import PurchaseOrder, POItem, Supplier, BOMItem
+from models.database import PurchaseOrder, POItem, Supplier, BOMItem, PO_NUMBER_SEQ, format_po_number
 from config import get_settings
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Parsed once at import rather than on every PO
+_APPROVAL_THRESHOLD = Decimal(str(settings.po_approval_threshold))
+_ZERO = Decimal("0")
+
+# Line money and quantities are summed as integers in 1/10,000ths, matching
+# the 4 decimal places of the po_items columns; Decimals are built only for
+# the values that are written
+_SCALE = 10_000
+
+
+def _to_units(value) -> int:
+    """Convert a quantity or price to integer 1/_SCALE units."""
+    return int(round(float(value) * _SCALE))
+
+
+def _from_units(units: int) -> Decimal:
+    """Convert integer 1/_SCALE units back to an exact Decimal."""
+    return Decimal(units).scaleb(-4)
+
 
 def generate_po_number_impl(db: Session) -> str:
     """Generate a unique PO number."""
-    count = db.query(PurchaseOrder).count()
-    return f"PO-{datetime.now().strftime('%Y%m')}-{count + 1:04d}"
+    return format_po_number(db.scalar(select(PO_NUMBER_SEQ.next_value())))
 
 
-def create_po_draft_impl(
+def _add_po_draft(
     db: Session,
     organization_id: int,
-    supplier_id: int,
+    supplier: Supplier,
     items: list[dict],
     bom_id: Optional[int] = None,
     bom_name: Optional[str] = None,
     required_date: Optional[str] = None,
     notes: Optional[str] = None,
 ) -> dict:
-    """
-    Create a draft purchase order.
-
-    Args:
-        db: Database session
-        organization_id: Organization ID
-        supplier_id: Supplier ID
-        items: List of item dictionaries with part details
-        bom_id: Optional associated BOM ID
-        bom_name: Optional name of source BOM (for display)
-        required_date: Optional required delivery date
-        notes: Optional notes
-
-    Returns:
-        Dictionary with created PO details
-    """
-    # Verify supplier exists
-    supplier = db.query(Supplier).filter(Supplier.id == supplier_id).first()
-    if not supplier:
-        return {"error": f"Supplier {supplier_id} not found"}
-
+    """Add a draft PO and its line items to the session (no commit)."""
     # Determine if this is auto-generated from a BOM
     is_auto_generated = bom_id is not None
 
@@ -60,7 +60,7 @@ def create_po_draft_impl(
     po = PurchaseOrder(
         organization_id=organization_id,
         po_number=generate_po_number_impl(db),
-        supplier_id=supplier_id,
+        supplier_id=supplier.id,
         bom_id=bom_id,
         is_auto_generated=is_auto_generated,
         source_bom_name=bom_name,
@@ -77,41 +77,41 @@ def create_po_draft_impl(
     db.add(po)
     db.flush()
 
-    # Add line items
-    subtotal = Decimal("0")
+    # Add line items in one executemany INSERT
+    rows = []
+    subtotal_units = 0
     for idx, item in enumerate(items, start=1):
-        unit_price = Decimal(str(item.get("unit_price", 0)))
-        quantity = Decimal(str(item.get("quantity", 1)))
-        extended = unit_price * quantity
-
-        po_item = POItem(
-            po_id=po.id,
-            line_number=idx,
-            bom_item_id=item.get("bom_item_id"),
-            part_id=item.get("part_id"),
-            supplier_part_id=item.get("supplier_part_id"),
-            part_number=item.get("part_number"),
-            description=item.get("description"),
-            quantity=quantity,
-            unit_of_measure=item.get("unit_of_measure", "EA"),
-            unit_price=unit_price,
-            extended_price=extended,
-        )
-        db.add(po_item)
-        subtotal += extended
+        price_units = _to_units(item.get("unit_price", 0))
+        quantity_units = _to_units(item.get("quantity", 1))
+        # Round half up to 4 places, as the DECIMAL(15, 4) column would
+        extended_units = (price_units * quantity_units + _SCALE // 2) // _SCALE
+        subtotal_units += extended_units
+        rows.append({
+            "po_id": po.id,
+            "line_number": idx,
+            "bom_item_id": item.get("bom_item_id"),
+            "part_id": item.get("part_id"),
+            "supplier_part_id": item.get("supplier_part_id"),
+            "part_number": item.get("part_number"),
+            "description": item.get("description"),
+            "quantity": _from_units(quantity_units),
+            "unit_of_measure": item.get("unit_of_measure", "EA"),
+            "unit_price": _from_units(price_units),
+            "extended_price": _from_units(extended_units),
+        })
+    if rows:
+        db.execute(insert(POItem), rows)
+    subtotal = _from_units(subtotal_units)
 
     po.subtotal = subtotal
     po.total = subtotal  # Tax and shipping added later if needed
-    po.requires_approval = po.total >= Decimal(str(settings.po_approval_threshold))
-
-    db.commit()
-    db.refresh(po)
+    po.requires_approval = po.total >= _APPROVAL_THRESHOLD
 
     return {
         "success": True,
         "po_id": po.id,
         "po_number": po.po_number,
-        "supplier_id": supplier_id,
+        "supplier_id": supplier.id,
         "supplier_name": supplier.name,
         "item_count": len(items),
         "subtotal": float(po.subtotal),
@@ -124,6 +124,84 @@ def create_po_draft_impl(
     }
 
 
+def create_po_draft_impl(
+    db: Session,
+    organization_id: int,
+    supplier_id: int,
+    items: list[dict],
+    bom_id: Optional[int] = None,
+    bom_name: Optional[str] = None,
+    required_date: Optional[str] = None,
+    notes: Optional[str] = None,
+) -> dict:
+    """
+    Create a draft purchase order.
+
+    Args:
+        db: Database session
+        organization_id: Organization ID
+        supplier_id: Supplier ID
+        items: List of item dictionaries with part details
+        bom_id: Optional associated BOM ID
+        bom_name: Optional name of source BOM (for display)
+        required_date: Optional required delivery date
+        notes: Optional notes
+
+    Returns:
+        Dictionary with created PO details
+    """
+    # Verify supplier exists
+    supplier = db.query(Supplier).filter(Supplier.id == supplier_id).first()
+    if not supplier:
+        return {"error": f"Supplier {supplier_id} not found"}
+
+    result = _add_po_draft(
+        db, organization_id, supplier, items, bom_id, bom_name, required_date, notes
+    )
+    db.commit()
+    return result
+
+
+def create_po_drafts_bulk(
+    db: Session,
+    organization_id: int,
+    items_by_supplier: dict[int, list[dict]],
+    bom_id: Optional[int] = None,
+    bom_name: Optional[str] = None,
+) -> list[dict]:
+    """
+    Create one draft purchase order per supplier in a single transaction.
+
+    Suppliers are loaded with one IN query rather than one SELECT per PO.
+
+    Args:
+        db: Database session
+        organization_id: Organization ID
+        items_by_supplier: Mapping of supplier ID to its line items, as
+            returned by group_items_by_supplier_impl
+        bom_id: Optional associated BOM ID
+        bom_name: Optional name of source BOM (for display)
+
+    Returns:
+        One result dictionary per supplier, in items_by_supplier order
+    """
+    suppliers = {
+        supplier.id: supplier
+        for supplier in db.query(Supplier).filter(Supplier.id.in_(list(items_by_supplier)))
+    }
+
+    results = []
+    for supplier_id, items in items_by_supplier.items():
+        supplier = suppliers.get(supplier_id)
+        if not supplier:
+            results.append({"error": f"Supplier {supplier_id} not found"})
+            continue
+        results.append(_add_po_draft(db, organization_id, supplier, items, bom_id, bom_name))
+
+    db.commit()
+    return results
+
+
 def validate_po_impl(po_id: int, db: Session) -> dict:
     """
     Validate a purchase order for completeness and correctness.
@@ -135,7 +213,13 @@ def validate_po_impl(po_id: int, db: Session) -> dict:
     Returns:
         Dictionary with validation results
     """
-    po = db.query(PurchaseOrder).filter(PurchaseOrder.id == po_id).first()
+    # Load the PO with its supplier in one joined query
+    po = (
+        db.query(PurchaseOrder)
+        .options(joinedload(PurchaseOrder.supplier))
+        .filter(PurchaseOrder.id == po_id)
+        .first()
+    )
 
     if not po:
         return {"valid": False, "errors": [f"PO {po_id} not found"]}
@@ -147,30 +231,47 @@ def validate_po_impl(po_id: int, db: Session) -> dict:
     if not po.supplier_id:
         errors.append("Missing supplier")
     else:
-        supplier = db.query(Supplier).filter(Supplier.id == po.supplier_id).first()
+        supplier = po.supplier
         if not supplier:
             errors.append(f"Invalid supplier ID: {po.supplier_id}")
         elif supplier.status != "active":
             warnings.append(f"Supplier '{supplier.name}' is not active")
 
-    # Check line items
-    items = db.query(POItem).filter(POItem.po_id == po_id).all()
+    # Check line items: count and total are aggregated in SQL, and only
+    # the lines that fail a check are fetched
+    item_count, calculated_subtotal = db.execute(
+        select(func.count(POItem.id), func.coalesce(func.sum(POItem.extended_price), _ZERO))
+        .where(POItem.po_id == po_id)
+    ).one()
 
-    if not items:
+    if not item_count:
         errors.append("No line items on PO")
     else:
-        for item in items:
-            if not item.quantity or item.quantity <= 0:
-                errors.append(f"Line {item.line_number}: Invalid quantity")
-            if not item.unit_price or item.unit_price < 0:
-                errors.append(f"Line {item.line_number}: Invalid unit price")
-            if not item.part_number and not item.description:
-                errors.append(f"Line {item.line_number}: Missing part number and description")
+        bad_quantity = or_(POItem.quantity.is_(None), POItem.quantity <= 0)
+        bad_price = or_(POItem.unit_price.is_(None), POItem.unit_price <= 0)
+        missing_identity = and_(
+            func.coalesce(POItem.part_number, "") == "",
+            func.coalesce(POItem.description, "") == "",
+        )
+        invalid_lines = db.execute(
+            select(
+                POItem.line_number,
+                bad_quantity.label("bad_quantity"),
+                bad_price.label("bad_price"),
+                missing_identity.label("missing_identity"),
+            )
+            .where(POItem.po_id == po_id, or_(bad_quantity, bad_price, missing_identity))
+            .order_by(POItem.line_number)
+        )
+        for line in invalid_lines:
+            if line.bad_quantity:
+                errors.append(f"Line {line.line_number}: Invalid quantity")
+            if line.bad_price:
+                errors.append(f"Line {line.line_number}: Invalid unit price")
+            if line.missing_identity:
+                errors.append(f"Line {line.line_number}: Missing part number and description")
 
     # Check totals
-    calculated_subtotal = sum(
-        (item.extended_price or Decimal("0")) for item in items
-    )
     if po.subtotal and abs(float(po.subtotal) - float(calculated_subtotal)) > 0.01:
         warnings.append(f"Subtotal mismatch: PO shows ${po.subtotal}, calculated ${calculated_subtotal}")
 
@@ -184,7 +285,7 @@ def validate_po_impl(po_id: int, db: Session) -> dict:
         "po_number": po.po_number,
         "errors": errors,
         "warnings": warnings,
-        "item_count": len(items),
+        "item_count": item_count,
         "total": float(po.total) if po.total else 0,
     }
 
@@ -207,26 +308,37 @@ def calculate_po_totals_impl(po_id: int, db: Session, tax_rate: float = 0, shipp
     if not po:
         return {"error": f"PO {po_id} not found"}
 
-    items = db.query(POItem).filter(POItem.po_id == po_id).all()
-
-    # Calculate subtotal
-    subtotal = Decimal("0")
-    for item in items:
-        if item.quantity and item.unit_price:
-            extended = item.quantity * item.unit_price
-            item.extended_price = extended
-            subtotal += extended
+    # Refresh extended prices and total them in the database; line items
+    # are never loaded into Python
+    db.execute(
+        update(POItem)
+        .where(
+            POItem.po_id == po_id,
+            POItem.quantity.isnot(None),
+            POItem.unit_price.isnot(None),
+        )
+        .values(extended_price=POItem.quantity * POItem.unit_price)
+        .execution_options(synchronize_session=False)
+    )
+    subtotal = db.scalar(
+        select(func.coalesce(func.sum(POItem.extended_price), 0)).where(
+            POItem.po_id == po_id,
+            POItem.quantity.isnot(None),
+            POItem.unit_price.isnot(None),
+        )
+    )
 
     # Calculate tax and total
+    shipping_amount = Decimal(str(shipping))
     tax = subtotal * Decimal(str(tax_rate))
-    total = subtotal + tax + Decimal(str(shipping))
+    total = subtotal + tax + shipping_amount
 
     # Update PO
     po.subtotal = subtotal
     po.tax = tax
-    po.shipping = Decimal(str(shipping))
+    po.shipping = shipping_amount
     po.total = total
-    po.requires_approval = total >= Decimal(str(settings.po_approval_threshold))
+    po.requires_approval = total >= _APPROVAL_THRESHOLD
 
     db.commit()
 
@@ -251,16 +363,13 @@ def group_items_by_supplier_impl(bom_items: list[dict]) -> dict[int, list[dict]]
     Returns:
         Dictionary mapping supplier_id to list of items
     """
-    grouped = {}
+    grouped = defaultdict(list)
 
     for item in bom_items:
         supplier_id = item.get("matched_supplier_id")
         if not supplier_id:
             continue
 
-        if supplier_id not in grouped:
-            grouped[supplier_id] = []
-
         grouped[supplier_id].append({
             "bom_item_id": item.get("id"),
             "part_id": item.get("part_id"),
@@ -272,7 +381,7 @@ def group_items_by_supplier_impl(bom_items: list[dict]) -> dict[int, list[dict]]
             "unit_price": item.get("unit_cost"),
         })
 
-    return grouped
+    return dict(grouped)
 
 
 # LangChain tool wrappers
@@ -1,22 +1,127 @@
 """
 Tools for searching and matching suppliers/parts.
 """
+import asyncio
+import heapq
 import logging
-from typing import Optional
+from collections import defaultdict
+from typing import Iterable, Optional
 
-from sqlalchemy.orm import Session
+import orjson
+from sqlalchemy import Float, Row, cast, func, lambda_stmt, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
 
-from models.database import Supplier, Part, SupplierPart
-from services.embedding import get_embedding_service
+from models.database import Supplier, Part, SupplierPart, normalize_part_number
+from models.db import get_db_context
+from services.embedding import get_embedding_service, normalize_embedding
+from services.semantic_cache import get_semantic_search_cache
 from config import get_settings
+from core.cache import catalog_cache_get, catalog_cache_set
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
 
-def search_supplier_catalog_impl(
-    db: Session,
+# Only the columns the match dicts use are fetched, as plain rows rather
+# than ORM entities. Prices arrive as floats, not Decimals.
+# Leading columns line up with the _MATCH_KEYS built from them.
+_OFFER_COLUMNS = (
+    Supplier.id.label("supplier_id"),
+    Supplier.name.label("supplier_name"),
+    Supplier.code.label("supplier_code"),
+    SupplierPart.id.label("supplier_part_id"),
+    SupplierPart.supplier_part_number,
+    cast(SupplierPart.unit_price, Float).label("unit_price"),
+    SupplierPart.lead_time_days,
+    SupplierPart.min_order_qty,
+    SupplierPart.is_preferred,
+    Supplier.lead_time_days.label("supplier_lead_time_days"),
+)
+_PART_COLUMNS = (
+    Part.id.label("part_id"),
+    Part.part_number,
+    Part.description,
+)
+_OFFER_MATCH_KEYS = (
+    "supplier_id",
+    "supplier_name",
+    "supplier_code",
+    "supplier_part_id",
+    "supplier_part_number",
+    "unit_price",
+    "lead_time_days",
+    "min_order_qty",
+    "is_preferred",
+)
+_PART_MATCH_KEYS = ("part_id", "part_number", "description")
+# Part columns follow the offer columns in joined catalog rows
+_CATALOG_PART_START = len(_OFFER_COLUMNS)
+# SQL side of the _rank_matches tie-break: preferred first, then cheapest
+_OFFER_ORDER = (
+    SupplierPart.is_preferred.desc().nulls_last(),
+    SupplierPart.unit_price.asc().nulls_last(),
+    SupplierPart.id,
+)
+CATALOG_MATCH_LIMIT = 10
+
+
+def _catalog_match(
+    offer: Row,
+    part: tuple,
+    confidence: float,
+    match_method: str,
+) -> dict:
+    """Build a catalog match result from an offer row and part columns."""
+    match = dict(zip(_OFFER_MATCH_KEYS, offer))
+    match.update(zip(_PART_MATCH_KEYS, part))
+    match["unit_price"] = offer.unit_price or None
+    match["lead_time_days"] = offer.lead_time_days or offer.supplier_lead_time_days
+    match["confidence"] = confidence
+    match["match_method"] = match_method
+    return match
+
+
+def _rank_key(match: dict) -> tuple:
+    """Sort key: highest confidence, then preferred, then cheapest."""
+    return (-match["confidence"], -int(bool(match["is_preferred"])), match["unit_price"] or 9999999)
+
+
+def _rank_matches(matches: Iterable[dict], limit: int) -> list[dict]:
+    """Best ``limit`` matches, keeping only that many in memory while ranking."""
+    return heapq.nsmallest(limit, matches, key=_rank_key)
+
+
+def _catalog_select():
+    """Offer and part columns of supplier parts joined to their supplier and part."""
+    return (
+        select(*_OFFER_COLUMNS, *_PART_COLUMNS)
+        .select_from(SupplierPart)
+        .join(Supplier, SupplierPart.supplier_id == Supplier.id)
+        .join(Part, SupplierPart.part_id == Part.id)
+    )
+
+
+async def _supplier_options(db: AsyncSession, part_ids: list[int]) -> dict[int, list[Row]]:
+    """Active supplier offer rows for the given parts, keyed by part ID."""
+    options = defaultdict(list)
+    if not part_ids:
+        return options
+
+    rows = await db.execute(lambda_stmt(
+        lambda: select(SupplierPart.part_id, *_OFFER_COLUMNS)
+        .join(Supplier, SupplierPart.supplier_id == Supplier.id)
+        .where(SupplierPart.part_id.in_(part_ids), Supplier.status == "active")
+        .order_by(SupplierPart.part_id, SupplierPart.id)
+    ))
+    for offer in rows:
+        options[offer.part_id].append(offer)
+    return options
+
+
+async def search_supplier_catalog_impl(
+    db: AsyncSession,
     part_number: str,
     organization_id: int,
 ) -> dict:
@@ -32,79 +137,81 @@ def search_supplier_catalog_impl(
         Dictionary with matching suppliers and parts
     """
     # Normalize part number for comparison
-    pn_normalized = part_number.strip().upper().replace("-", "").replace(" ", "")
+    pn_normalized = normalize_part_number(part_number)
+
+    # Match against the indexed normalized part number columns, so only
+    # matching rows leave the database. The exact lookup runs on every BOM
+    # line, so it is a lambda statement: SQLAlchemy builds and caches it
+    # once and only rebinds the parameters.
+    exact_rows = (await db.execute(lambda_stmt(
+        lambda: _catalog_select().where(
+            Supplier.organization_id == organization_id,
+            Supplier.status == "active",
+            or_(
+                SupplierPart.supplier_part_number_norm == pn_normalized,
+                SupplierPart.part_id.in_(
+                    select(Part.id).where(
+                        Part.organization_id == organization_id,
+                        Part.part_number_norm == pn_normalized,
+                    )
+                ),
+            ),
+        )
+        .order_by(*_OFFER_ORDER)
+        .limit(CATALOG_MATCH_LIMIT)
+    ))).all()
+
+    # Exact matches always outrank fuzzy ones, so the fuzzy pass only
+    # runs when nothing matched exactly
+    if exact_rows:
+        exact_matches = (
+            _catalog_match(row, row[_CATALOG_PART_START:], 1.0, "exact")
+            for row in exact_rows
+        )
+        return {
+            "part_number_searched": part_number,
+            "exact_matches": len(exact_rows),
+            "fuzzy_matches": 0,
+            "matches": _rank_matches(exact_matches, CATALOG_MATCH_LIMIT),
+        }
 
-    # Search in supplier_parts by supplier_part_number
-    matches = (
-        db.query(SupplierPart, Supplier, Part)
-        .join(Supplier, SupplierPart.supplier_id == Supplier.id)
-        .join(Part, SupplierPart.part_id == Part.id)
-        .filter(Supplier.organization_id == organization_id)
-        .filter(Supplier.status == "active")
-        .all()
+    # Substring matches are served by the pg_trgm indexes; trigram
+    # similarity to the query becomes the match confidence
+    similarity = func.greatest(
+        func.similarity(SupplierPart.supplier_part_number_norm, pn_normalized),
+        func.similarity(Part.part_number_norm, pn_normalized),
     )
+    # (not a lambda: autoescape rewrites the bound value at construction)
+    fuzzy_rows = (await db.execute(
+        _catalog_select()
+        .add_columns(similarity.label("similarity"))
+        .where(
+            Supplier.organization_id == organization_id,
+            Supplier.status == "active",
+            or_(
+                SupplierPart.supplier_part_number_norm.contains(pn_normalized, autoescape=True),
+                Part.part_number_norm.contains(pn_normalized, autoescape=True),
+            ),
+        )
+        .order_by(similarity.desc(), *_OFFER_ORDER)
+        .limit(CATALOG_MATCH_LIMIT)
+    )).all()
 
-    exact_matches = []
-    fuzzy_matches = []
-
-    for sp, supplier, part in matches:
-        # Check supplier part number
-        sp_pn = (sp.supplier_part_number or "").strip().upper().replace("-", "").replace(" ", "")
-        part_pn = (part.part_number or "").strip().upper().replace("-", "").replace(" ", "")
-
-        if sp_pn == pn_normalized or part_pn == pn_normalized:
-            exact_matches.append({
-                "supplier_id": supplier.id,
-                "supplier_name": supplier.name,
-                "supplier_code": supplier.code,
-                "supplier_part_id": sp.id,
-                "part_id": part.id,
-                "part_number": part.part_number,
-                "supplier_part_number": sp.supplier_part_number,
-                "description": part.description,
-                "unit_price": float(sp.unit_price) if sp.unit_price else None,
-                "lead_time_days": sp.lead_time_days or supplier.lead_time_days,
-                "min_order_qty": sp.min_order_qty,
-                "is_preferred": sp.is_preferred,
-                "confidence": 1.0,
-                "match_method": "exact",
-            })
-        elif pn_normalized in sp_pn or pn_normalized in part_pn:
-            fuzzy_matches.append({
-                "supplier_id": supplier.id,
-                "supplier_name": supplier.name,
-                "supplier_code": supplier.code,
-                "supplier_part_id": sp.id,
-                "part_id": part.id,
-                "part_number": part.part_number,
-                "supplier_part_number": sp.supplier_part_number,
-                "description": part.description,
-                "unit_price": float(sp.unit_price) if sp.unit_price else None,
-                "lead_time_days": sp.lead_time_days or supplier.lead_time_days,
-                "min_order_qty": sp.min_order_qty,
-                "is_preferred": sp.is_preferred,
-                "confidence": 0.85,
-                "match_method": "fuzzy",
-            })
-
-    # Sort by preference and price
-    all_matches = exact_matches + fuzzy_matches
-    all_matches.sort(key=lambda x: (
-        -x["confidence"],
-        -int(x["is_preferred"]),
-        x["unit_price"] or 9999999,
-    ))
+    fuzzy_matches = (
+        _catalog_match(row, row[_CATALOG_PART_START:], float(row.similarity), "fuzzy")
+        for row in fuzzy_rows
+    )
 
     return {
         "part_number_searched": part_number,
-        "exact_matches": len(exact_matches),
-        "fuzzy_matches": len(fuzzy_matches),
-        "matches": all_matches[:10],  # Top 10
+        "exact_matches": 0,
+        "fuzzy_matches": len(fuzzy_rows),
+        "matches": _rank_matches(fuzzy_matches, CATALOG_MATCH_LIMIT),
     }
 
 
-def semantic_part_search_impl(
-    db: Session,
+async def semantic_part_search_impl(
+    db: AsyncSession,
     description: str,
     organization_id: int,
     top_k: int = 5,
@@ -125,73 +232,67 @@ def semantic_part_search_impl(
     """
     embedding_service = get_embedding_service()
 
-    # Create query embedding
-    query_embedding = embedding_service.create_embedding(description)
+    # Create query embedding, checking out the session's connection meanwhile
+    query_embedding, _ = await asyncio.gather(
+        embedding_service.acreate_embedding(description),
+        db.connection(),
+    )
 
-    # Search parts by embedding similarity
-    results = (
-        db.query(
-            Part,
-            Part.description_embedding.cosine_distance(query_embedding).label("distance")
+    # Near-duplicate descriptions reuse an earlier result
+    cache = get_semantic_search_cache()
+    cache_scope = (organization_id, top_k, min_similarity)
+    query_vector = normalize_embedding(query_embedding)
+    cached = cache.get(cache_scope, query_vector)
+    if cached is not None:
+        return {"description_searched": description, "matches": list(cached["matches"])}
+
+    # Nearest parts by embedding. Stored embeddings and the query are unit
+    # length, so the (negated) inner product is the cosine. The similarity
+    # threshold is applied outside this MATERIALIZED CTE: inside it, an
+    # HNSW iterative scan finding too few qualifying rows would keep
+    # walking the graph up to hnsw.max_scan_tuples. Twice top_k parts are
+    # taken, as parts without an active offer drop out at the join below.
+    distance = Part.description_embedding.max_inner_product(query_vector)
+    ranked = (
+        select(*_PART_COLUMNS, distance.label("distance"))
+        .where(
+            Part.organization_id == organization_id,
+            Part.description_embedding.isnot(None),
         )
-        .filter(Part.organization_id == organization_id)
-        .filter(Part.description_embedding.isnot(None))
-        .order_by("distance")
+        .order_by(distance)
         .limit(top_k * 2)
-        .all()
+        .cte("ranked")
+        .prefix_with("MATERIALIZED")
     )
-
-    matches = []
-    for part, distance in results:
-        similarity = 1 - distance
-        if similarity < min_similarity:
-            continue
-
-        # Get supplier options for this part
-        supplier_parts = (
-            db.query(SupplierPart, Supplier)
-            .join(Supplier, SupplierPart.supplier_id == Supplier.id)
-            .filter(SupplierPart.part_id == part.id)
-            .filter(Supplier.status == "active")
-            .all()
+    # Their active supplier offers above the threshold, ranked and cut to
+    # top_k in the same round-trip. (supplier_id, part_id) is unique, so
+    # no offer repeats.
+    rows = (await db.execute(
+        select(*_OFFER_COLUMNS, *ranked.c)
+        .select_from(ranked)
+        .join(SupplierPart, SupplierPart.part_id == ranked.c.part_id)
+        .join(Supplier, SupplierPart.supplier_id == Supplier.id)
+        .where(
+            ranked.c.distance <= -min_similarity,
+            Supplier.status == "active",
         )
+        .order_by(ranked.c.distance, *_OFFER_ORDER)
+        .limit(top_k)
+    )).all()
 
-        for sp, supplier in supplier_parts:
-            matches.append({
-                "supplier_id": supplier.id,
-                "supplier_name": supplier.name,
-                "supplier_code": supplier.code,
-                "supplier_part_id": sp.id,
-                "part_id": part.id,
-                "part_number": part.part_number,
-                "supplier_part_number": sp.supplier_part_number,
-                "description": part.description,
-                "unit_price": float(sp.unit_price) if sp.unit_price else None,
-                "lead_time_days": sp.lead_time_days or supplier.lead_time_days,
-                "min_order_qty": sp.min_order_qty,
-                "is_preferred": sp.is_preferred,
-                "confidence": similarity,
-                "match_method": "semantic",
-            })
-
-        if len(matches) >= top_k:
-            break
-
-    # Sort by confidence and price
-    matches.sort(key=lambda x: (
-        -x["confidence"],
-        -int(x["is_preferred"]),
-        x["unit_price"] or 9999999,
-    ))
-
-    return {
+    result = {
         "description_searched": description,
-        "matches": matches[:top_k],
+        "matches": [
+            _catalog_match(row, row[_CATALOG_PART_START:], -row.distance, "semantic")
+            for row in rows
+        ],
     }
+    cache.put(cache_scope, query_vector, result)
+    return result
 
 
-def find_alternative_parts_impl(
-    db: Session,
+async def find_alternative_parts_impl(
+    db: AsyncSession,
     part_id: int,
     organization_id: int,
 ) -> dict:
@@ -206,8 +307,17 @@ def find_alternative_parts_impl(
     Returns:
         Dictionary with alternative parts and suppliers
     """
+    # Catalog writes retire cached alternatives, so a hit is always current
+    # (the sync Redis calls run in a worker thread, off the event loop)
+    cache_key = f"alternatives:{organization_id}:{part_id}"
+    cached = await asyncio.to_thread(catalog_cache_get, cache_key)
+    if cached:
+        return orjson.loads(cached)
+
     # Get original part
-    original = db.query(Part).filter(Part.id == part_id).first()
+    original = (await db.execute(lambda_stmt(
+        lambda: select(Part.part_number, Part.category).where(Part.id == part_id)
+    ))).first()
 
     if not original:
         return {
@@ -219,48 +329,59 @@ def find_alternative_parts_impl(
     alternatives = []
 
     if original.category:
-        similar_parts = (
-            db.query(Part)
-            .filter(Part.organization_id == organization_id)
-            .filter(Part.category == original.category)
-            .filter(Part.id != part_id)
+        category = original.category
+        similar_parts = (await db.execute(lambda_stmt(
+            lambda: select(*_PART_COLUMNS)
+            .where(
+                Part.organization_id == organization_id,
+                Part.category == category,
+                Part.id != part_id,
+            )
             .limit(10)
-            .all()
-        )
+        ))).all()
 
-        for part in similar_parts:
-            # Get supplier options
-            supplier_parts = (
-                db.query(SupplierPart, Supplier)
-                .join(Supplier, SupplierPart.supplier_id == Supplier.id)
-                .filter(SupplierPart.part_id == part.id)
-                .filter(Supplier.status == "active")
-                .all()
-            )
+        # Get supplier options for all similar parts in one query
+        options = await _supplier_options(db, [part.part_id for part in similar_parts])
 
-            for sp, supplier in supplier_parts:
+        for part in similar_parts:
+            for offer in options.get(part.part_id, ()):
                 alternatives.append({
-                    "supplier_id": supplier.id,
-                    "supplier_name": supplier.name,
-                    "supplier_part_id": sp.id,
-                    "part_id": part.id,
+                    "supplier_id": offer.supplier_id,
+                    "supplier_name": offer.supplier_name,
+                    "supplier_part_id": offer.supplier_part_id,
+                    "part_id": part.part_id,
                     "part_number": part.part_number,
                     "description": part.description,
-                    "unit_price": float(sp.unit_price) if sp.unit_price else None,
-                    "lead_time_days": sp.lead_time_days or supplier.lead_time_days,
+                    "unit_price": offer.unit_price or None,
+                    "lead_time_days": offer.lead_time_days or offer.supplier_lead_time_days,
                     "is_alternative": True,
                 })
 
-    return {
+    result = {
         "original_part_id": part_id,
         "original_part_number": original.part_number,
         "alternatives": alternatives,
     }
+    await asyncio.to_thread(catalog_cache_set, cache_key, orjson.dumps(result).decode())
+    return result
+
+
+def _tool_json(result: dict) -> str:
+    """Serialize a tool result for the agent."""
+    return orjson.dumps(result, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+
+def _organization_id(config: RunnableConfig) -> Optional[int]:
+    """Organization the agent run is scoped to, from the run config."""
+    return (config.get("configurable") or {}).get("organization_id")
+
+
+_MISSING_ORGANIZATION = "organization_id missing from the run config"
 
 
 # LangChain tool wrappers
 @tool
-def search_supplier_catalog(part_number: str) -> str:
+async def search_supplier_catalog(part_number: str, config: RunnableConfig) -> str:
     """
     Search for exact part number matches in the supplier catalog.
 
@@ -270,12 +391,16 @@ def search_supplier_catalog(part_number: str) -> str:
     Returns:
         JSON string with matching suppliers and pricing
     """
-    # Note: In actual usage, this would receive db session from context
-    return f"Search for part number: {part_number}"
+    organization_id = _organization_id(config)
+    if organization_id is None:
+        return _tool_json({"error": _MISSING_ORGANIZATION, "matches": []})
+    async with get_db_context() as db:
+        result = await search_supplier_catalog_impl(db, part_number, organization_id)
+    return _tool_json(result)
 
 
 @tool
-def semantic_part_search(description: str) -> str:
+async def semantic_part_search(description: str, config: RunnableConfig) -> str:
     """
     Search for parts using semantic similarity on descriptions.
 
@@ -285,11 +410,16 @@ def semantic_part_search(description: str) -> str:
     Returns:
         JSON string with matching parts ranked by similarity
     """
-    return f"Semantic search for: {description}"
+    organization_id = _organization_id(config)
+    if organization_id is None:
+        return _tool_json({"error": _MISSING_ORGANIZATION, "matches": []})
+    async with get_db_context(ef_search=settings.hnsw_ef_search) as db:
+        result = await semantic_part_search_impl(db, description, organization_id)
+    return _tool_json(result)
 
 
 @tool
-def find_alternative_parts(part_id: int) -> str:
+async def find_alternative_parts(part_id: int, config: RunnableConfig) -> str:
     """
     Find alternative or substitute parts for a given part.
 
@@ -299,4 +429,9 @@ def find_alternative_parts(part_id: int) -> str:
     Returns:
         JSON string with alternative parts and their suppliers
     """
-    return f"Find alternatives for part ID: {part_id}"
+    organization_id = _organization_id(config)
+    if organization_id is None:
+        return _tool_json({"error": _MISSING_ORGANIZATION, "alternatives": []})
+    async with get_db_context() as db:
+        result = await find_alternative_parts_impl(db, part_id, organization_id)
+    return _tool_json(result)